@@ -0,0 +1,37 @@
+"""
+Connection strategies for DATABASES['default'], picked by DATABASE_CONNECTIONS:
+
+- ``persistent``: each worker thread keeps its connection for DATABASE_CONN_MAX_AGE
+  seconds and checks it before reusing it in a new request.
+- ``pool``: a psycopg 3 pool per process (Django 5.1+), sized by DATABASE_POOL_MIN_SIZE
+  and DATABASE_POOL_MAX_SIZE; the choice for the asgi profile, where a request's
+  queries do not stay on one long-lived thread.
+- ``per-request``: connect at the first query of a request, close at its end.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+CONNECTION_MODES = ("persistent", "pool", "per-request")
+
+
+def connection_settings(mode):
+    if mode == "persistent":
+        return {"CONN_MAX_AGE": int(os.getenv("DATABASE_CONN_MAX_AGE", "600")), "CONN_HEALTH_CHECKS": True}
+    if mode == "pool":
+        # Pooling requires CONN_MAX_AGE = 0; returned connections are checked by the pool.
+        return {"CONN_MAX_AGE": 0, "OPTIONS": {"pool": {
+            "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+        }}}
+    if mode == "per-request":
+        return {"CONN_MAX_AGE": 0}
+    raise ImproperlyConfigured(f"DATABASE_CONNECTIONS must be one of {', '.join(CONNECTION_MODES)}, not {mode!r}.")
+
+
+def with_connection_mode(database, mode):
+    """A copy of a DATABASES entry configured for ``mode``."""
+    extra = connection_settings(mode)
+    options = {**database.get("OPTIONS", {}), **extra.pop("OPTIONS", {})}
+    return {**database, **extra, "OPTIONS": options}
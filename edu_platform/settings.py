@@ -2,6 +2,10 @@ from pathlib import Path
 from datetime import timedelta
 import os
 from dotenv import load_dotenv
+
+from django.core.exceptions import ImproperlyConfigured
+
+from edu_platform.database import with_connection_mode
 from datetime import timedelta
 
 # Load environment variables from .env file
@@ -44,13 +48,53 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'myapp.authentication.StudentJWTAuthentication',
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Sliding windows per client IP and per submitted username/email (myapp.throttling).
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', '30/min'),
+        'login_account': os.getenv('THROTTLE_LOGIN_ACCOUNT', '10/min'),
+        'signup_ip': os.getenv('THROTTLE_SIGNUP_IP', '10/hour'),
+        'export': os.getenv('THROTTLE_EXPORT', '30/hour'),
+    },
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES')) if os.getenv('NUM_PROXIES') else None,
+}
+
+# Cache backend (CACHE_BACKEND):
+# - 'locmem': per process; fine for one worker and for tests
+# - 'file': a directory (CACHE_LOCATION) shared by the workers of one host
+# - 'redis': a Redis-compatible server (CACHE_LOCATION, e.g. redis://cache:6379/0) shared by all hosts
+# Versions, throttle windows and token revocations live here too, so run several
+# workers or hosts with 'redis' (or at least 'file').
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}, not {CACHE_BACKEND!r}.")
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', {
+            'locmem': 'edu-platform',
+            'file': '/var/tmp/edu_platform_cache',
+            'redis': 'redis://127.0.0.1:6379/0',
+        }[CACHE_BACKEND]),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'edu'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+        'OPTIONS': {} if CACHE_BACKEND == 'redis' else {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))},
+    }
 }
 
+# Cache alias holding the throttle windows.
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE', 'default')
+
 LOGIN_URL = '/login/'
 
 
@@ -93,6 +137,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'edu_platform.wsgi.application'
 
+# Serving stack, see gunicorn.conf.py: 'wsgi' (sync workers) or 'asgi' (uvicorn workers,
+# with the course list, course and lesson pages served by myapp.async_views).
+SERVER_PROFILE = os.getenv('SERVER_PROFILE', 'wsgi')
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', str(SERVER_PROFILE == 'asgi')) == 'True'
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -107,12 +156,23 @@ DATABASES = {
     }
 }
 
+# 'persistent', 'pool' or 'per-request', see edu_platform/database.py;
+# compare them with `python manage.py bench_db_connections`.
+DATABASE_CONNECTIONS = os.getenv('DATABASE_CONNECTIONS', 'pool' if SERVER_PROFILE == 'asgi' else 'persistent')
+DATABASES['default'] = with_connection_mode(DATABASES['default'], DATABASE_CONNECTIONS)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'myapp.serializers.StudentTokenRefreshSerializer',
 }
 
+# Validated student tokens are remembered per process for up to JWT_CACHE_TTL seconds
+# (myapp.authentication), bounded to JWT_CACHE_SIZE entries.
+JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', '10000'))
+JWT_CACHE_TTL = int(os.getenv('JWT_CACHE_TTL', '60'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -131,9 +191,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
-PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+# The first hasher hashes new passwords; the others still verify old ones, which are
+# rehashed on the next login. Raising a cost below also rehashes on login.
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'myapp.hashers.TunablePBKDF2PasswordHasher',
+    'scrypt': 'myapp.hashers.TunableScryptPasswordHasher',
+}
+_PREFERRED_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[_PREFERRED_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != _PREFERRED_HASHER
 ]
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '870000'))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', str(2 ** 14)))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.getenv('PASSWORD_SCRYPT_BLOCK_SIZE', '8'))
+PASSWORD_SCRYPT_PARALLELISM = int(os.getenv('PASSWORD_SCRYPT_PARALLELISM', '1'))
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -148,14 +219,38 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+
+# Django 5.1 only reads STORAGES (STATICFILES_STORAGE/DEFAULT_FILE_STORAGE are gone).
+STORAGES = {
+    "default": {
+        "BACKEND": "myapp.custom_storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
 
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Internal location of a front proxy (e.g. nginx `internal;` alias of MEDIA_ROOT).
+# When set, lesson videos are answered with X-Accel-Redirect instead of streamed by Django.
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+
+# HLS transcoding of lesson uploads (`python manage.py process_videos`)
+VIDEO_ENCODER = os.getenv('VIDEO_ENCODER', 'myapp.video_processing.FFmpegEncoder')
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+HLS_SEGMENT_SECONDS = int(os.getenv('HLS_SEGMENT_SECONDS', '6'))
+# A lesson processing for longer than this many seconds was claimed by a worker that died and is
+# claimed again; keep it above the longest encode.
+VIDEO_CLAIM_TIMEOUT = int(os.getenv('VIDEO_CLAIM_TIMEOUT', '7200'))
+
+# Text search configuration for /courses/search/ on PostgreSQL (e.g. 'english', 'russian', 'simple')
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'english')
+
 
-CKEDITOR_STORAGE_BACKEND = 'myapp.custom_storage.UniqueFilenameStorage'
+CKEDITOR_5_FILE_STORAGE = 'myapp.custom_storage.ContentAddressedStorage'
 CKEDITOR_5_UPLOADS = 'course_images/'
 CKEDITOR_5_CONFIGS = {
     'default': {
@@ -0,0 +1,37 @@
+"""
+gunicorn settings. SERVER_PROFILE picks the serving stack:
+
+- ``wsgi`` (default): sync workers running edu_platform.wsgi; each worker
+  process (times GUNICORN_THREADS) handles one request at a time.
+- ``asgi``: uvicorn workers running edu_platform.asgi, where the course list,
+  course and lesson pages are async views (myapp.async_views), so one process
+  keeps serving while requests wait on the database or storage.
+  There is no sendfile here: lesson videos are read through the worker in
+  chunks, so set MEDIA_ACCEL_REDIRECT_PREFIX to hand them to the proxy instead.
+
+Compare the two with ``python manage.py loadtest --compare``.
+
+WEB_CONCURRENCY sets the number of worker processes (default 1). More than one
+needs a cache shared between processes (CACHE_BACKEND 'file' or 'redis'): with
+'locmem' each worker would keep its own course versions and enrollment sets.
+"""
+import os
+
+profile = os.getenv("SERVER_PROFILE", "wsgi")
+if profile not in ("wsgi", "asgi"):
+    raise RuntimeError(f"SERVER_PROFILE must be 'wsgi' or 'asgi', not {profile!r}")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+if workers > 1 and os.getenv("CACHE_BACKEND", "locmem") == "locmem":
+    raise RuntimeError("WEB_CONCURRENCY > 1 needs a shared cache: set CACHE_BACKEND to 'file' or 'redis'")
+
+if profile == "asgi":
+    wsgi_app = "edu_platform.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "edu_platform.wsgi:application"
+    threads = int(os.getenv("GUNICORN_THREADS", "1"))
+    worker_class = "gthread" if threads > 1 else "sync"
@@ -1,7 +1,12 @@
 from django.contrib import admin
 from django import forms
 from django_ckeditor_5.widgets import CKEditor5Widget
-from .models import Author, Course, Module, Lesson, AuthorCourse, Student
+from .models import (
+    Author, Course, Module, Lesson, AuthorCourse, Student,
+    format_duration, parse_course_duration, parse_module_duration,
+)
+from .search import filter_courses
+from .signals import batch_course_updates
 from django.contrib.auth.models import Group
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
@@ -57,16 +62,43 @@ class AuthorAdmin(admin.ModelAdmin):
     get_user_role.short_description = 'Role'
 
 
+class DurationField(forms.CharField):
+    """Edits a minutes column as "3 weeks" / "2 hours"; a bare number is taken as minutes."""
+
+    def __init__(self, parse, **kwargs):
+        self.parse = parse
+        super().__init__(**kwargs)
+
+    def prepare_value(self, value):
+        return format_duration(value) if isinstance(value, int) else value
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if value in self.empty_values:
+            return None
+        return int(value) if value.isdigit() else self.parse(value)
+
+
 class CourseAdminForm(forms.ModelForm):
     description = forms.CharField(widget=forms.Textarea, required=False)
+    duration = DurationField(parse_course_duration, help_text="e.g. '3 weeks' or '1 day'")
 
     class Meta:
         model = Course
         fields = '__all__'
 
 
+class ModuleAdminForm(forms.ModelForm):
+    duration = DurationField(parse_module_duration, help_text="e.g. '2 hours' or '15 minutes'")
+
+    class Meta:
+        model = Module
+        fields = '__all__'
+
+
 class ModuleInline(admin.TabularInline):
     model = Module
+    form = ModuleAdminForm
     extra = 1
     fields = ['module', 'duration']
     show_change_link = True
@@ -89,6 +121,17 @@ class CourseAdmin(admin.ModelAdmin):
     list_filter = ['level']
     autocomplete_fields = ['author']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text match over title, description and lessons instead of title__icontains.
+        if not search_term.strip():
+            return queryset, False
+        return filter_courses(queryset, search_term), False
+
+    def save_related(self, request, form, formsets, change):
+        # Recount the course once for the whole inline formset.
+        with batch_course_updates():
+            super().save_related(request, form, formsets, change)
+
 
 class LessonInline(admin.TabularInline):
     model = Lesson
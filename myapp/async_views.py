@@ -0,0 +1,172 @@
+"""
+Async versions of the read-heavy endpoints, routed in place of the DRF views when
+ASYNC_READ_VIEWS is on (the ``asgi`` profile of gunicorn.conf.py). Independent
+queries are awaited together, and serialization (which may call a slow storage
+backend for ``.url``) runs in a worker thread, so a slow request never holds up
+the others served by the same process. Writes are handed to the sync views.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef
+from django.http import Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_safe
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import views
+from .authentication import StudentJWTAuthentication
+from .cache import aget_course_detail, catalog_pages
+from .conditional import make_etag, not_modified, set_validators
+from .enrollment import aenrolled_course_ids
+from .models import Course, Lesson, Module, Review
+from .pagination import InvalidCursor, apaginate, get_page_size
+from .serializers import CourseSerializer, ReviewSerializer
+
+_authentication = StudentJWTAuthentication()
+
+
+def offload(func):
+    # For code that touches no database: runs outside the ORM's thread.
+    return sync_to_async(func, thread_sensitive=False)
+
+
+def json_response(data, status=200, **kwargs):
+    # Same rendering as DRF's JSONRenderer.
+    return JsonResponse(
+        data, status=status, encoder=JSONEncoder,
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")}, **kwargs,
+    )
+
+
+def not_found():
+    return json_response({"detail": "Not found."}, 404)
+
+
+def unauthorized(request, exc):
+    response = json_response(exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}, exc.status_code)
+    response.headers["WWW-Authenticate"] = _authentication.authenticate_header(request)
+    return response
+
+
+async def authenticate(request):
+    """The ``TokenStudent`` behind the bearer token, or None without one; raises ``AuthenticationFailed``."""
+    result = await sync_to_async(_authentication.authenticate)(request)
+    return result[0] if result else None
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'POST'])
+async def course_list(request):
+    if request.method == 'POST':
+        return await sync_to_async(views.course_list)(request)
+    try:
+        user = await authenticate(request)
+    except AuthenticationFailed as e:
+        return unauthorized(request, e)
+
+    courses, error = views.catalog_courses(request.GET)
+    if error:
+        return json_response({"error": error}, 400)
+
+    stamps_page = apaginate(courses.values('id', 'updated_at'), ('id',), request.GET.get('cursor'), get_page_size(request))
+    try:
+        if user is None:
+            (stamps, next_cursor), enrolled = await stamps_page, None
+        else:
+            (stamps, next_cursor), enrolled = await asyncio.gather(stamps_page, aenrolled_course_ids(user.id))
+    except InvalidCursor as e:
+        return json_response({"error": str(e)}, 400)
+    private = enrolled is not None
+
+    etag = views.catalog_etag(request, stamps, next_cursor, user and user.id, enrolled)
+    response = not_modified(request, etag, private=private)
+    if response is not None:
+        return response
+
+    async def build():
+        page = [course async for course in courses.filter(id__in=[row['id'] for row in stamps]).order_by('id')]
+        return await offload(lambda: list(CourseSerializer(page, many=True, context={'request': request}).data))()
+
+    results = await catalog_pages.aget_or_build((views.catalog_page_key(stamps),), build) if stamps else []
+    if private:
+        results = [{**course_data, "enrolled": course_data["id"] in enrolled} for course_data in results]
+    response = json_response({"results": results, "next_cursor": next_cursor})
+    return set_validators(response, etag, private=private)
+
+
+async def review_page(course_id, rating=None, sort='newest', cursor=None, page_size=views.REVIEW_PAGE_SIZE):
+    page, next_cursor = await apaginate(
+        views.review_queryset(course_id, rating), views.REVIEW_ORDERINGS[sort], cursor, page_size
+    )
+    return {"results": ReviewSerializer(page, many=True).data, "next_cursor": next_cursor}
+
+
+async def course_modules(course_id):
+    return [module async for module in Module.objects.filter(course_id=course_id).prefetch_related('lessons')]
+
+
+async def build_course_detail(course_id):
+    course, modules, reviews = await asyncio.gather(
+        views.COURSE_DETAIL.filter(id=course_id).afirst(),
+        course_modules(course_id),
+        review_page(course_id),
+    )
+    if course is None:
+        raise Http404
+    return await offload(views.course_detail)(course, modules, reviews)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'POST'])
+async def course(request, id):
+    if request.method == 'POST':
+        return await sync_to_async(views.course)(request, id=id)
+    try:
+        user = await authenticate(request)
+    except AuthenticationFailed as e:
+        return unauthorized(request, e)
+    if user is None:
+        # No token, or a non-student (admin) token: the DRF view answers those.
+        return await sync_to_async(views.course)(request, id=id)
+
+    stamp, enrolled = await asyncio.gather(
+        Course.objects.filter(id=id).annotate(
+            reviewed=Exists(Review.objects.filter(course=OuterRef('pk'), user_id=user.id)),
+        ).values('updated_at', 'reviewed').afirst(),
+        aenrolled_course_ids(user.id),
+    )
+    if stamp is None:
+        return not_found()
+    enrolled = id in enrolled
+
+    etag = make_etag('course', id, stamp['updated_at'].timestamp(), user.id, stamp['reviewed'], enrolled)
+    response = not_modified(request, etag, private=True)
+    if response is not None:
+        return response
+
+    try:
+        detail = await aget_course_detail(id, lambda: build_course_detail(id))
+    except Http404:
+        return not_found()
+    return set_validators(json_response(views.course_page(detail, stamp['reviewed'], enrolled)), etag, private=True)
+
+
+@require_safe
+async def lesson(request, id, lessonid=None, name=None):
+    lessons = Lesson.objects.filter(id=lessonid, module__course_id=id)
+    updated_at = await lessons.values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return not_found()
+
+    etag = make_etag('lesson', lessonid, updated_at.timestamp())
+    response = not_modified(request, etag, updated_at)
+    if response is not None:
+        return response
+
+    lesson = await lessons.afirst()
+    if lesson is None:
+        return not_found()
+    data = await offload(views.lesson_data)(request, id, lesson)
+    return set_validators(json_response(data), etag, updated_at)
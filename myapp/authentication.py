@@ -0,0 +1,152 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Student
+from .revocation import is_revoked, revoke
+
+STUDENT_ID_CLAIM = "student_id"
+
+
+def revoke_token(token):
+    revoke(token[api_settings.JTI_CLAIM], token["exp"])
+
+
+class StudentRefreshToken(RefreshToken):
+    """
+    Tokens for Student rows; access tokens derived from them copy these claims.
+    Revocation goes through myapp.revocation instead of simplejwt's blacklist app.
+    """
+
+    def verify(self):
+        super().verify()
+        if is_revoked(self[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        revoke_token(self)
+
+    @classmethod
+    def for_user(cls, student):
+        token = cls()
+        token[STUDENT_ID_CLAIM] = student.id
+        token["role"] = student.role
+        token["username"] = student.username
+        return token
+
+
+class TokenStudent:
+    """
+    The authenticated principal built from token claims alone. ``student`` loads
+    the full row on first use, for the views that need more than id/role/username.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        self.id = self.pk = token[STUDENT_ID_CLAIM]
+        self.role = token.get("role")
+        self.username = token.get("username")
+
+    @cached_property
+    def student(self):
+        return Student.objects.filter(pk=self.id).first()
+
+    def __str__(self):
+        return self.username or str(self.id)
+
+
+class TokenCache:
+    """Bounded LRU of validated tokens, each kept at most ``ttl`` seconds and never past its expiry."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        lifetime = min(self.ttl, token.get("exp", 0) - time.time())
+        if lifetime <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (token, time.monotonic() + lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(getattr(settings, "JWT_CACHE_SIZE", 10000), getattr(settings, "JWT_CACHE_TTL", 60))
+
+
+def _cache_key(raw_token):
+    if isinstance(raw_token, str):
+        raw_token = raw_token.encode()
+    return hashlib.sha256(raw_token).digest()
+
+
+def forget_token(raw_token):
+    token_cache.discard(_cache_key(raw_token))
+
+
+class StudentJWTAuthentication(JWTAuthentication):
+    """
+    Resolves student tokens to a ``TokenStudent`` without a database query, and
+    skips signature verification for tokens validated in the last few seconds.
+    Revocation is checked (cache first, then one indexed lookup) when a token is
+    (re)validated, so a logged-out access token stops working in other processes
+    within ``JWT_CACHE_TTL``.
+    Tokens without a student claim (e.g. admin tokens from /api/token/) are left
+    to the next authentication class.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if STUDENT_ID_CLAIM not in validated_token:
+            return None
+        return TokenStudent(validated_token), validated_token
+
+    def get_validated_token(self, raw_token):
+        key = _cache_key(raw_token)
+        validated_token = token_cache.get(key)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            if is_revoked(validated_token[api_settings.JTI_CLAIM]):
+                raise InvalidToken("Token is blacklisted")
+            token_cache.set(key, validated_token)
+        return validated_token
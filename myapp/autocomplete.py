@@ -0,0 +1,153 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import bump_version, get_version
+from .models import Course
+
+AUTOCOMPLETE_VERSION_KEY = "autocomplete:version"
+AUTOCOMPLETE_TITLES_KEY = "autocomplete:titles"
+AUTOCOMPLETE_LOCK_KEY = "autocomplete:lock"
+# The shared title map expires now and then so any drift heals itself.
+AUTOCOMPLETE_TIMEOUT = 24 * 60 * 60
+MAX_SUGGESTIONS = 10
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    return " ".join("".join(char for char in text if not unicodedata.combining(char)).casefold().split())
+
+
+def title_keys(title):
+    # One key per word start, so "dja" also finds "Web development with Django".
+    words = normalize(title).split()
+    return [" ".join(words[start:]) for start in range(len(words))]
+
+
+class PrefixIndex:
+    """
+    Sorted (key, course id) lists: whole titles, and titles from their second word on.
+    A prefix query is a bisection plus a scan that stops after ``limit`` courses.
+    """
+
+    def __init__(self, titles=()):
+        self.titles = dict(titles)
+        self.title_keys, self.word_keys = [], []
+        for course_id, title in self.titles.items():
+            keys = title_keys(title)
+            self.title_keys.append((keys[0] if keys else "", course_id))
+            self.word_keys.extend((key, course_id) for key in keys[1:])
+        self.title_keys.sort()
+        self.word_keys.sort()
+
+    def copy(self):
+        clone = PrefixIndex()
+        clone.titles, clone.title_keys, clone.word_keys = dict(self.titles), list(self.title_keys), list(self.word_keys)
+        return clone
+
+    def add(self, course_id, title):
+        self.remove(course_id)
+        self.titles[course_id] = title
+        keys = title_keys(title)
+        insort(self.title_keys, (keys[0] if keys else "", course_id))
+        for key in keys[1:]:
+            insort(self.word_keys, (key, course_id))
+
+    def remove(self, course_id):
+        title = self.titles.pop(course_id, None)
+        if title is None:
+            return
+        keys = title_keys(title)
+        for entries, key in [(self.title_keys, keys[0] if keys else "")] + [(self.word_keys, key) for key in keys[1:]]:
+            index = bisect_left(entries, (key, course_id))
+            if index < len(entries) and entries[index] == (key, course_id):
+                del entries[index]
+
+    def suggest(self, prefix, limit=MAX_SUGGESTIONS):
+        """Courses with a word starting with ``prefix``, those whose title starts with it first."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        seen, results = set(), []
+        for entries in (self.title_keys, self.word_keys):
+            index = bisect_left(entries, (prefix,))
+            while len(results) < limit and index < len(entries) and entries[index][0].startswith(prefix):
+                course_id = entries[index][1]
+                if course_id not in seen:
+                    seen.add(course_id)
+                    results.append({"id": course_id, "title": self.titles[course_id]})
+                index += 1
+        return results
+
+
+_local = (None, None)
+_local_lock = threading.Lock()
+
+
+def _shared_titles(version):
+    # The map is stamped with the version it reflects; one written for an older version is rebuilt.
+    entry = cache.get(AUTOCOMPLETE_TITLES_KEY)
+    if isinstance(entry, tuple) and entry[0] == version:
+        return entry[1]
+    titles = dict(Course.objects.values_list("id", "title"))
+    cache.set(AUTOCOMPLETE_TITLES_KEY, (version, titles), AUTOCOMPLETE_TIMEOUT)
+    return titles
+
+
+def get_index():
+    """
+    The process-local index for the current shared version. A hit is one cache
+    read; a stale process reloads the title map from the cache, not the database.
+    """
+    global _local
+    version = get_version(AUTOCOMPLETE_VERSION_KEY)
+    if _local[0] != version:
+        with _local_lock:
+            if _local[0] != version:
+                _local = (version, PrefixIndex(_shared_titles(version)))
+    return _local[1]
+
+
+def suggest(prefix, limit=MAX_SUGGESTIONS):
+    return get_index().suggest(prefix, limit)
+
+
+def _apply(course_id, title):
+    global _local
+    # Read-modify-write of the shared map under a lock. A writer that can't get the
+    # lock only bumps the version, which leaves any map the holder writes stale, so
+    # the next reader rebuilds it from the database rather than missing a change.
+    locked = cache.add(AUTOCOMPLETE_LOCK_KEY, 1, timeout=5)
+    try:
+        previous = get_version(AUTOCOMPLETE_VERSION_KEY)
+        entry = cache.get(AUTOCOMPLETE_TITLES_KEY) if locked else None
+        version = bump_version(AUTOCOMPLETE_VERSION_KEY)
+        if isinstance(entry, tuple) and entry[0] == previous and version == previous + 1:
+            titles = entry[1]
+            if title is None:
+                titles.pop(course_id, None)
+            else:
+                titles[course_id] = title
+            cache.set(AUTOCOMPLETE_TITLES_KEY, (version, titles), AUTOCOMPLETE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(AUTOCOMPLETE_LOCK_KEY)
+
+    with _local_lock:
+        # Patch a copy of our index (readers keep the old one) unless another process
+        # changed the titles in between.
+        if _local[1] is not None and _local[0] == previous and version == previous + 1:
+            index = _local[1].copy()
+            if title is None:
+                index.remove(course_id)
+            else:
+                index.add(course_id, title)
+            _local = (version, index)
+
+
+def course_title_changed(course_id, title=None):
+    """Updates the suggestions once the transaction commits; ``title=None`` removes the course."""
+    transaction.on_commit(lambda: _apply(course_id, title))
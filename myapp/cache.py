@@ -0,0 +1,187 @@
+import asyncio
+import math
+import random
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+COURSE_DETAIL_TIMEOUT = 60 * 60
+CATALOG_PAGE_TIMEOUT = 10 * 60
+# Timeouts are spread by this fraction either way so entries written together
+# (e.g. after a deploy) don't all expire together.
+TTL_JITTER = 0.1
+# Probabilistic early refresh ("XFetch"): an entry is rebuilt ahead of its expiry
+# with a probability that grows as expiry nears and with how long it took to build.
+EARLY_REFRESH_BETA = 1.0
+# Single flight: one caller rebuilds a missing entry while the others wait for it.
+REBUILD_LOCK_TIMEOUT = 10
+REBUILD_WAIT = 2.0
+REBUILD_POLL = 0.05
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Seed from the clock so a lost counter can never reuse an old version.
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def jittered(timeout):
+    return max(1, round(timeout * random.uniform(1 - TTL_JITTER, 1 + TTL_JITTER)))
+
+
+def _due_for_refresh(expires_at, cost):
+    return time.time() - cost * EARLY_REFRESH_BETA * math.log(1 - random.random()) >= expires_at
+
+
+class Namespace:
+    """
+    Cached values under ``<name>:...``. Each entry remembers the versions it was
+    built for: the namespace's own (``invalidate()`` drops every entry at once)
+    and optionally a per-object version key. A hit is one ``get_many`` round trip.
+    """
+
+    def __init__(self, name, timeout):
+        self.name, self.timeout = name, timeout
+        self.version_key = self.key("version")
+
+    def key(self, *parts):
+        return ":".join([self.name, *map(str, parts)])
+
+    def invalidate(self):
+        bump_version(self.version_key)
+
+    def _version_keys(self, version_key):
+        return [self.version_key] + ([version_key] if version_key else [])
+
+    def _lookup(self, key, version_keys, cached):
+        """``(versions, value, state)``; state is "fresh", "refresh" (valid but due) or "miss"."""
+        versions = tuple(cached.get(version_key) for version_key in version_keys)
+        entry = cached.get(key)
+        if None in versions or entry is None or entry[0] != versions:
+            return versions, None, "miss"
+        _, value, expires_at, cost = entry
+        return versions, value, "refresh" if _due_for_refresh(expires_at, cost) else "fresh"
+
+    def _entry(self, versions, value, cost):
+        timeout = jittered(self.timeout)
+        return (versions, value, time.time() + timeout, cost), timeout
+
+    def get_or_build(self, parts, build, version_key=None):
+        key, version_keys = self.key(*parts), self._version_keys(version_key)
+        versions, value, state = self._lookup(key, version_keys, cache.get_many([*version_keys, key]))
+        if state == "fresh":
+            return value
+
+        lock_key = key + ":rebuild"
+        locked = cache.add(lock_key, 1, REBUILD_LOCK_TIMEOUT)
+        if not locked:
+            if state == "refresh":
+                return value  # another caller is refreshing it already
+            deadline = time.monotonic() + REBUILD_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(REBUILD_POLL)
+                versions, value, state = self._lookup(key, version_keys, cache.get_many([*version_keys, key]))
+                if state != "miss":
+                    return value
+            # Gave up waiting: build our own copy, but leave the holder's lock alone.
+        try:
+            # Read the versions before building so an edit made mid-build invalidates our copy.
+            if None in versions:
+                versions = tuple(get_version(version_key) for version_key in version_keys)
+            started = time.perf_counter()
+            value = build()
+            entry, timeout = self._entry(versions, value, time.perf_counter() - started)
+            cache.set(key, entry, timeout)
+            return value
+        finally:
+            if locked:
+                cache.delete(lock_key)
+
+    async def aget_or_build(self, parts, build, version_key=None):
+        """``get_or_build`` for async views; ``build`` is a coroutine function."""
+        key, version_keys = self.key(*parts), self._version_keys(version_key)
+        versions, value, state = self._lookup(key, version_keys, await cache.aget_many([*version_keys, key]))
+        if state == "fresh":
+            return value
+
+        lock_key = key + ":rebuild"
+        locked = await cache.aadd(lock_key, 1, REBUILD_LOCK_TIMEOUT)
+        if not locked:
+            if state == "refresh":
+                return value
+            deadline = time.monotonic() + REBUILD_WAIT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(REBUILD_POLL)
+                versions, value, state = self._lookup(key, version_keys, await cache.aget_many([*version_keys, key]))
+                if state != "miss":
+                    return value
+        try:
+            if None in versions:
+                versions = tuple([await aget_version(version_key) for version_key in version_keys])
+            started = time.perf_counter()
+            value = await build()
+            entry, timeout = self._entry(versions, value, time.perf_counter() - started)
+            await cache.aset(key, entry, timeout)
+            return value
+        finally:
+            if locked:
+                await cache.adelete(lock_key)
+
+
+course_details = Namespace("course", COURSE_DETAIL_TIMEOUT)
+# Keyed by the (id, updated_at) stamps of a page, so edits need no invalidation.
+catalog_pages = Namespace("catalog", CATALOG_PAGE_TIMEOUT)
+NAMESPACES = {namespace.name: namespace for namespace in (course_details, catalog_pages)}
+
+
+def _course_version_key(course_id):
+    return f"course:{course_id}:version"
+
+
+def bump_course_version(*course_ids):
+    keys = [_course_version_key(course_id) for course_id in course_ids]
+
+    def bump():
+        for key in keys:
+            bump_version(key)
+
+    # Also after commit: a reader in between rebuilds from the old rows and caches that under the new version.
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_course_version(course_id):
+    return get_version(_course_version_key(course_id))
+
+
+def get_course_detail(course_id, build):
+    """
+    Returns the student-independent course document, rebuilding it with ``build()``
+    when the stored copy was made for an older content version.
+    """
+    return course_details.get_or_build((course_id, "detail"), build, _course_version_key(course_id))
+
+
+async def aget_course_detail(course_id, build):
+    return await course_details.aget_or_build((course_id, "detail"), build, _course_version_key(course_id))
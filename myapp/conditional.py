@@ -0,0 +1,36 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(":".join(str(part) for part in parts).encode(), usedforsecurity=False)
+    return f'"{digest.hexdigest()}"'
+
+
+def set_validators(response, etag=None, last_modified=None, private=False):
+    if etag:
+        response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+    if private:
+        response.headers["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ("Authorization",))
+    else:
+        response.headers.setdefault("Cache-Control", "no-cache")
+    return response
+
+
+def not_modified(request, etag=None, last_modified=None, private=False):
+    """
+    Returns a 304 response when the client's validators still match, otherwise
+    None. Evaluated before any payload is loaded or serialized.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified, private=private)
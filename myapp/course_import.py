@@ -0,0 +1,253 @@
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+
+from .autocomplete import course_title_changed
+from .models import Author, Course, Lesson, Module, in_batches, parse_course_duration, parse_module_duration
+from .search import search_content_changed
+from .signals import batch_course_updates
+
+IMPORT_BATCH_SIZE = 500
+# One lesson per row; course and module columns may repeat or be left empty on follow-up rows.
+CSV_COLUMNS = (
+    "course_title", "course_description", "course_duration", "course_level", "author",
+    "module", "module_duration",
+    "lesson_name", "lesson_short_description", "lesson_video_url", "lesson_content",
+)
+REQUIRED_CSV_COLUMNS = (
+    "course_title", "course_description", "course_duration",
+    "module", "module_duration", "lesson_name", "lesson_video_url",
+)
+
+LEVELS = {value for value, _ in Course.LEVEL_CHOICES}
+validate_url = URLValidator()
+
+
+class InvalidImport(ValueError):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} problem(s) in the import")
+        self.errors = errors
+
+
+def read_json(data):
+    """Course records from parsed JSON: a list of courses or ``{"courses": [...]}``."""
+    if isinstance(data, dict):
+        data = data.get("courses")
+    if not isinstance(data, list):
+        raise InvalidImport(["Expected a list of courses."])
+    return data
+
+
+def read_csv(text):
+    """Course records from CSV rows (see ``CSV_COLUMNS``), grouped by consecutive course and module."""
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [column for column in REQUIRED_CSV_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise InvalidImport([f"Missing CSV column(s): {', '.join(missing)}."])
+
+    courses = []
+    for row in reader:
+        where = f"line {reader.line_num}"
+        row = {column: (row.get(column) or "").strip() for column in CSV_COLUMNS}
+        if not courses or (row["course_title"] and row["course_title"] != courses[-1]["title"]):
+            courses.append({
+                "title": row["course_title"],
+                "description": row["course_description"],
+                "duration": row["course_duration"],
+                "level": row["course_level"] or "all",
+                "author": row["author"] or None,
+                "modules": [],
+                "_where": where,
+            })
+        modules = courses[-1]["modules"]
+        if not modules or (row["module"] and row["module"] != modules[-1]["module"]):
+            modules.append({"module": row["module"], "duration": row["module_duration"], "lessons": [], "_where": where})
+        if row["lesson_name"] or row["lesson_video_url"]:
+            modules[-1]["lessons"].append({
+                "name": row["lesson_name"],
+                "short_description": row["lesson_short_description"] or None,
+                "video_url": row["lesson_video_url"],
+                "content": row["lesson_content"] or None,
+                "_where": where,
+            })
+    return courses
+
+
+def read_upload(upload):
+    """Course records from an uploaded ``.csv`` or JSON file."""
+    try:
+        text = upload.read().decode("utf-8-sig")
+        if upload.name.lower().endswith(".csv") or upload.content_type == "text/csv":
+            return read_csv(text)
+        return read_json(json.loads(text))
+    except InvalidImport:
+        raise
+    except ValueError as e:  # also UnicodeDecodeError and json.JSONDecodeError
+        raise InvalidImport([f"Unreadable file: {e}"])
+
+
+class _Checker:
+    def __init__(self):
+        self.errors = []
+
+    def text(self, record, field, where, required=True, max_length=None):
+        value = record.get(field)
+        if value is None or value == "":
+            if required:
+                self.errors.append(f"{where}: {field} is required.")
+            return None
+        if not isinstance(value, str):
+            self.errors.append(f"{where}: {field} must be a string.")
+            return None
+        value = value.strip()
+        if max_length and len(value) > max_length:
+            self.errors.append(f"{where}: {field} must be at most {max_length} characters.")
+        return value
+
+    def duration(self, record, where, parse):
+        try:
+            return parse(record.get("duration", ""))
+        except ValidationError as e:
+            self.errors.append(f"{where}: {e.messages[0]}")
+
+    def items(self, record, field, where):
+        value = record.get(field) or []
+        if not isinstance(value, list):
+            self.errors.append(f"{where}: {field} must be a list.")
+            return []
+        return value
+
+
+def build_courses(records, author=None):
+    """
+    Validates the records in memory and returns unsaved ``(course, [(module, [lesson, ...]), ...])``
+    trees. Every problem is collected and raised together as ``InvalidImport``. With
+    ``author`` set, each course gets that author and ``author`` in the records is ignored.
+    """
+    check = _Checker()
+    authors = {}
+    if author is None:
+        usernames = {
+            record["author"] for record in records
+            if isinstance(record, dict) and isinstance(record.get("author"), str)
+        }
+        authors = {
+            found.user.username: found
+            for found in Author.objects.select_related("user").filter(user__username__in=usernames)
+        }
+
+    plan = []
+    for i, record in enumerate(records):
+        where = f"courses[{i}]"
+        if not isinstance(record, dict):
+            check.errors.append(f"{where}: expected an object.")
+            continue
+        where = record.get("_where", where)
+
+        course = Course(
+            title=check.text(record, "title", where, max_length=200),
+            description=check.text(record, "description", where),
+            duration=check.duration(record, where, parse_course_duration),
+            level=record.get("level") or "all",
+            author=author,
+        )
+        if not isinstance(course.level, str) or course.level not in LEVELS:
+            check.errors.append(f"{where}: level must be one of {', '.join(sorted(LEVELS))}.")
+        if author is None and record.get("author"):
+            course.author = authors.get(record["author"]) if isinstance(record["author"], str) else None
+            if course.author is None:
+                check.errors.append(f"{where}: unknown author {record['author']!r}.")
+
+        modules = []
+        for j, module_record in enumerate(check.items(record, "modules", where)):
+            module_where = f"{where}.modules[{j}]"
+            if not isinstance(module_record, dict):
+                check.errors.append(f"{module_where}: expected an object.")
+                continue
+            module_where = module_record.get("_where", module_where)
+            module = Module(
+                module=check.text(module_record, "module", module_where, max_length=200),
+                duration=check.duration(module_record, module_where, parse_module_duration),
+            )
+
+            lessons = []
+            for k, lesson_record in enumerate(check.items(module_record, "lessons", module_where)):
+                lesson_where = f"{module_where}.lessons[{k}]"
+                if not isinstance(lesson_record, dict):
+                    check.errors.append(f"{lesson_where}: expected an object.")
+                    continue
+                lesson_where = lesson_record.get("_where", lesson_where)
+                # Imports carry video links only; uploads go through the admin.
+                video_url = check.text(lesson_record, "video_url", lesson_where)
+                if video_url:
+                    try:
+                        validate_url(video_url)
+                    except ValidationError:
+                        check.errors.append(f"{lesson_where}: video_url is not a valid URL.")
+                lessons.append(Lesson(
+                    name=check.text(lesson_record, "name", lesson_where, max_length=200),
+                    short_description=check.text(lesson_record, "short_description", lesson_where, required=False),
+                    video_url=video_url,
+                    content=check.text(lesson_record, "content", lesson_where, required=False),
+                ))
+            modules.append((module, lessons))
+        plan.append((course, modules))
+
+    if not plan and not check.errors:
+        check.errors.append("Nothing to import.")
+    if check.errors:
+        raise InvalidImport(check.errors)
+    return plan
+
+
+def import_courses(records, author=None, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Creates the courses with their modules and lessons in one transaction, with
+    batched INSERTs, then recounts, stamps and reindexes the new courses once.
+    Returns the number of rows per model (and the new course ids unless ``dry_run``).
+    """
+    plan = build_courses(records, author)
+    summary = {
+        "courses": len(plan),
+        "modules": sum(len(modules) for _, modules in plan),
+        "lessons": sum(len(lessons) for _, modules in plan for _, lessons in modules),
+        "course_ids": [],
+    }
+    if dry_run:
+        return summary
+
+    # bulk_create sends no signals, so the bookkeeping they do per row happens here per course.
+    with transaction.atomic(), batch_course_updates() as touched:
+        courses = [course for course, _ in plan]
+        for batch in in_batches(courses, batch_size):
+            Course.objects.bulk_create(batch)
+
+        modules = []
+        for course, module_plan in plan:
+            for module, _ in module_plan:
+                module.course = course
+                modules.append(module)
+        for batch in in_batches(modules, batch_size):
+            Module.objects.bulk_create(batch)
+
+        lessons = []
+        for _, module_plan in plan:
+            for module, module_lessons in module_plan:
+                for lesson in module_lessons:
+                    lesson.module = module
+                    lessons.append(lesson)
+        for batch in in_batches(lessons, batch_size):
+            Lesson.objects.bulk_create(batch)
+
+        course_ids = [course.id for course in courses]
+        touched.update(course_ids)
+        search_content_changed(*course_ids)
+        for course in courses:
+            course_title_changed(course.id, course.title)
+
+    summary["course_ids"] = course_ids
+    return summary
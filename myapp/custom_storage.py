@@ -1,13 +1,68 @@
+import hashlib
 import os
+import re
+
 from django.core.files.storage import FileSystemStorage
 from django.utils.crypto import get_random_string
 
-class UniqueFilenameStorage(FileSystemStorage):
-    def get_available_name(self, name, max_length=None):
-        dir_name, file_name = os.path.split(name)
-        file_root, file_ext = os.path.splitext(file_name)
+BLOB_NAME_RE = re.compile(r"(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[^/]*)?$")
+
 
-        while self.exists(name):
-            name = os.path.join(dir_name, f"{file_root}_{get_random_string(6)}{file_ext}")
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file as ``<upload dir>/<ab>/<cd>/<sha256><ext>``. The upload is
+    hashed while it is streamed to a staging file, so identical content is kept
+    once and an existing blob costs no second write.
+    """
 
+    chunk_size = 64 * 1024
+    staging_dir = ".staging"
+
+    def get_available_name(self, name, max_length=None):
+        # The final name only depends on the content; collisions are duplicates.
         return name
+
+    def blob_name(self, directory, digest, extension):
+        return os.path.join(directory, digest[:2], digest[2:4], digest + extension)
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+
+        staging = self.path(self.staging_dir)
+        os.makedirs(staging, exist_ok=True)
+        temp_path = os.path.join(staging, get_random_string(16) + extension)
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, "wb") as staged:
+                for chunk in content.chunks(self.chunk_size):
+                    digest.update(chunk)
+                    staged.write(chunk)
+
+            name = self.blob_name(directory, digest.hexdigest(), extension)
+            full_path = self.path(name)
+            if not self._reuse(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.directory_permissions_mode is not None:
+                    os.chmod(os.path.dirname(full_path), self.directory_permissions_mode)
+                # Atomic; a concurrent writer of the same blob can only write identical bytes.
+                os.replace(temp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return name.replace("\\", "/")
+
+    def _reuse(self, full_path):
+        """
+        Marks an existing blob as just written. gc_media spares young blobs, so an
+        old orphan that a new upload reuses isn't collected before that row commits.
+        """
+        try:
+            os.utime(full_path)
+        except FileNotFoundError:  # not there, or collected a moment ago
+            return False
+        return True
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Student, in_batches
+
+Enrollment = Student.enrolled_courses.through
+ENROLLMENT_TIMEOUT = 60 * 60
+
+
+def _enrollment_key(student_id):
+    return f"student:{student_id}:enrolled"
+
+
+def enrolled_course_ids(student_id):
+    """The ids of the courses a student is enrolled in, cached until an enrollment changes."""
+    key = _enrollment_key(student_id)
+    course_ids = cache.get(key)
+    if course_ids is None:
+        course_ids = frozenset(Enrollment.objects.filter(student_id=student_id).values_list("course_id", flat=True))
+        cache.set(key, course_ids, ENROLLMENT_TIMEOUT)
+    return course_ids
+
+
+async def aenrolled_course_ids(student_id):
+    key = _enrollment_key(student_id)
+    course_ids = await cache.aget(key)
+    if course_ids is None:
+        course_ids = frozenset([
+            course_id async for course_id in Enrollment.objects.filter(student_id=student_id).values_list("course_id", flat=True)
+        ])
+        await cache.aset(key, course_ids, ENROLLMENT_TIMEOUT)
+    return course_ids
+
+
+def invalidate_enrollments(*student_ids):
+    keys = [_enrollment_key(student_id) for student_id in student_ids]
+    if keys:
+        # Also after commit, so a reader can't re-cache the pre-transaction set meanwhile.
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def resolve_students(identifiers, batch_size=1000):
+    """Maps ids, usernames or emails to student ids; returns ``(ids, unknown identifiers)``."""
+    identifiers = [str(identifier).strip() for identifier in identifiers if str(identifier).strip()]
+    found, ids = set(), set()
+    for batch in in_batches(identifiers, batch_size):
+        numeric = [int(value) for value in batch if value.isdigit()]
+        emails = [value for value in batch if "@" in value]
+        usernames = [value for value in batch if not value.isdigit() and "@" not in value]
+        for field, values in (("id", numeric), ("email", emails), ("username", usernames)):
+            if values:
+                for row in Student.objects.filter(**{f"{field}__in": values}).values("id", field):
+                    ids.add(row["id"])
+                    found.add(str(row[field]))
+    return ids, [identifier for identifier in identifiers if identifier not in found]
+
+
+def bulk_enroll(student_ids, course_ids, batch_size=1000):
+    """
+    Enrolls every student in every course with chunked INSERTs that skip existing
+    pairs. Returns the number of new enrollments.
+    """
+    student_ids, course_ids = sorted(set(student_ids)), sorted(set(course_ids))
+    if not student_ids or not course_ids:
+        return 0
+
+    with transaction.atomic():
+        before = Enrollment.objects.filter(student_id__in=student_ids, course_id__in=course_ids).count()
+        pairs = (Enrollment(student_id=student_id, course_id=course_id)
+                 for student_id in student_ids for course_id in course_ids)
+        for batch in in_batches(pairs, batch_size):
+            Enrollment.objects.bulk_create(batch, ignore_conflicts=True)
+        after = Enrollment.objects.filter(student_id__in=student_ids, course_id__in=course_ids).count()
+        invalidate_enrollments(*student_ids)
+    return after - before
@@ -0,0 +1,106 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .images import srcset
+from .models import Course, Lesson, Module, format_duration
+
+EXPORT_CHUNK_SIZE = 500
+
+COURSE_FIELDS = (
+    "id", "title", "description", "duration", "level", "updated_at", "course_image", "course_image_variants",
+    "author", "author__user", "author__user__username",
+    *Course.RATING_FIELDS,
+    *Course.TOTAL_FIELDS,
+)
+# Lesson content stays out of the export.
+LESSON_FIELDS = ("id", "module_id", "name", "short_description", "video_url", "video_status")
+
+
+def parse_updated_since(value):
+    """An aware datetime from an ISO 8601 string (naive ones are taken as local time); raises ValueError."""
+    updated_since = parse_datetime(value)
+    if updated_since is None:
+        raise ValueError("updated_since must be an ISO 8601 datetime.")
+    if timezone.is_naive(updated_since):
+        updated_since = timezone.make_aware(updated_since)
+    return updated_since
+
+
+def export_queryset(updated_since=None):
+    lessons = Lesson.objects.only(*LESSON_FIELDS).order_by("id")
+    modules = Module.objects.only("id", "course_id", "module", "duration").order_by("id").prefetch_related(
+        Prefetch("lessons", queryset=lessons)
+    )
+    courses = (
+        Course.objects.select_related("author__user").only(*COURSE_FIELDS)
+        .prefetch_related(Prefetch("modules", queryset=modules))
+        .order_by("id")
+    )
+    if updated_since is not None:
+        courses = courses.filter(updated_at__gte=updated_since)
+    return courses
+
+
+def course_record(course):
+    return {
+        "id": course.id,
+        "title": course.title,
+        "description": course.description,
+        "author": course.author.user.username if course.author and course.author.user else None,
+        "level": course.level,
+        "duration": format_duration(course.duration),
+        "duration_minutes": course.duration,
+        "course_image": course.course_image.url if course.course_image else None,
+        "course_image_srcset": srcset(course.course_image, course.course_image_variants),
+        "updated_at": course.updated_at,
+        "rating_count": course.rating_count,
+        "rating_average": course.rating_average,
+        "rating_histogram": course.rating_histogram,
+        "total_lessons": course.total_lessons,
+        "total_module_minutes": course.total_module_minutes,
+        "modules": [
+            {
+                "id": module.id,
+                "module": module.module,
+                "duration_minutes": module.duration,
+                "lessons": [
+                    {
+                        "id": lesson.id,
+                        "name": lesson.name,
+                        "short_description": lesson.short_description,
+                        "video_url": lesson.video_url,
+                        "video_status": lesson.video_status,
+                    }
+                    for lesson in module.lessons.all()
+                ],
+            }
+            for module in course.modules.all()
+        ],
+    }
+
+
+def course_line(course):
+    return json.dumps(course_record(course), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def export_lines(updated_since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the catalog as NDJSON, one course (with its modules and lessons) per line.
+    Courses are read ``chunk_size`` at a time with their modules and lessons
+    prefetched per chunk, so memory and queries per chunk stay constant.
+    """
+    for course in export_queryset(updated_since).iterator(chunk_size=chunk_size):
+        yield course_line(course)
+
+
+async def aexport_lines(updated_since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    ``export_lines`` for ASGI servers, which would otherwise drain a sync
+    iterator into a list before sending the first byte.
+    """
+    async for course in export_queryset(updated_since).aiterator(chunk_size=chunk_size):
+        yield course_line(course)
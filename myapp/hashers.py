@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+class TunableScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Memory-hard scrypt with its cost taken from settings. Hashes made with other
+    parameters still verify and are upgraded on the next successful login.
+    """
+
+    @property
+    def work_factor(self):
+        return getattr(settings, "PASSWORD_SCRYPT_WORK_FACTOR", 2**14)
+
+    @property
+    def block_size(self):
+        return getattr(settings, "PASSWORD_SCRYPT_BLOCK_SIZE", 8)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "PASSWORD_SCRYPT_PARALLELISM", 1)
+
+    @property
+    def maxmem(self):
+        # hashlib's default ceiling (32 MiB) is below 128 * n * r for larger costs.
+        return 256 * self.work_factor * self.block_size
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,64 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (160, 320, 640, 1280)
+DERIVATIVE_QUALITY = 80
+# Variants are built in the request that saved the upload (signup included), so larger
+# sources are left as they are instead of being decoded.
+MAX_SOURCE_PIXELS = 40_000_000
+
+
+def build_variants(field_file, widths=DERIVATIVE_WIDTHS):
+    """
+    Writes WebP copies of an uploaded image at each width narrower than the original
+    (or one at the original width if it is already small) and returns the map stored
+    on the model: ``{"source": <name>, "widths": {"320": <name>, ...}}``.
+    """
+    variants = {"source": field_file.name, "widths": {}}
+    try:
+        with field_file.open("rb") as source:
+            image = Image.open(source)
+            if image.width * image.height > MAX_SOURCE_PIXELS:
+                logger.warning("Not building image variants of %s: %dx%d is too large",
+                               field_file.name, image.width, image.height)
+                return variants
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning("Could not read %s to build image variants", field_file.name)
+        return variants
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    stem = os.path.splitext(field_file.name)[0]
+    for width in [w for w in widths if w < image.width] or [image.width]:
+        height = max(1, round(image.height * width / image.width))
+        buffer = BytesIO()
+        image.resize((width, height), Image.LANCZOS).save(buffer, "WEBP", quality=DERIVATIVE_QUALITY, method=4)
+        name = field_file.storage.save(f"derivatives/{stem}_{width}w.webp", ContentFile(buffer.getvalue()))
+        variants["widths"][str(width)] = name
+    return variants
+
+
+def needs_variants(field_file, variants):
+    if not field_file:
+        return bool(variants)
+    return (variants or {}).get("source") != field_file.name
+
+
+def srcset(field_file, variants):
+    """Maps width -> URL of the derivatives, plus ``original``; None without an image."""
+    if not field_file:
+        return None
+    urls = {}
+    if (variants or {}).get("source") == field_file.name:
+        urls = {width: field_file.storage.url(name) for width, name in variants["widths"].items()}
+    urls["original"] = field_file.url
+    return urls
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from myapp.course_import import IMPORT_BATCH_SIZE, build_courses, import_courses
+
+
+def sample_courses(courses, modules, lessons):
+    return [
+        {
+            "title": f"Benchmark course {c}",
+            "description": "Imported by bench_course_import.",
+            "duration": "4 weeks",
+            "modules": [
+                {
+                    "module": f"Module {m}",
+                    "duration": "2 hours",
+                    "lessons": [
+                        {"name": f"Lesson {m}.{n}", "video_url": f"https://videos.example.com/{c}/{m}/{n}",
+                         "content": "<p>Lesson text.</p>" * 20}
+                        for n in range(lessons)
+                    ],
+                }
+                for m in range(modules)
+            ],
+        }
+        for c in range(courses)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare creating the same courses row by row (what the admin does: a save, its signals "
+        "and counter updates per module and lesson) with import_courses. Both run in a "
+        "transaction that is rolled back, so nothing is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=1)
+        parser.add_argument("--modules", type=int, default=20, help="Modules per course.")
+        parser.add_argument("--lessons", type=int, default=15, help="Lessons per module.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, courses, modules, lessons, batch_size, **options):
+        records = sample_courses(courses, modules, lessons)
+        rows = courses * (1 + modules * (1 + lessons))
+
+        self.stdout.write(f"{'method':<10} {'rows':>7} {'seconds':>9} {'rows/s':>9} {'queries':>8}")
+        for label, run in (
+            ("row-by-row", lambda: self.save_rows(records)),
+            ("bulk", lambda: import_courses(records, batch_size=batch_size)),
+        ):
+            with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            self.stdout.write(f"{label:<10} {rows:>7} {elapsed:>9.2f} {rows / elapsed:>9.0f} {len(queries):>8}")
+
+    def save_rows(self, records):
+        for course, modules in build_courses(records):
+            course.save()
+            for module, module_lessons in modules:
+                module.course = course
+                module.save()
+                for lesson in module_lessons:
+                    lesson.module = module
+                    lesson.save()
@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.db.utils import ConnectionHandler
+
+from edu_platform.database import CONNECTION_MODES, with_connection_mode
+from myapp.models import Lesson
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the database side of a cheap request (the lesson page's stamp lookup) under each "
+        "DATABASE_CONNECTIONS mode, including the connection handling Django does when a request "
+        "starts and finishes. Run it against the real database host to see the connect/TLS cost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Simulated requests per mode.")
+        parser.add_argument("--modes", nargs="*", choices=CONNECTION_MODES, default=list(CONNECTION_MODES))
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, requests, modes, database, **options):
+        lesson = Lesson.objects.using(database).values("id", "module__course_id").order_by("id").first()
+        lesson = lesson or {"id": 0, "module__course_id": 0}
+        query = (
+            Lesson.objects.using(database).filter(id=lesson["id"], module__course_id=lesson["module__course_id"])
+            .values_list("updated_at", flat=True)[:1].query
+        )
+
+        self.stdout.write(f"{'mode':<12} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'connects':>9}")
+        for mode in modes:
+            config = with_connection_mode(settings.DATABASES[database], mode)
+            try:
+                timings, connects = self.measure(database, config, query, requests)
+            except Exception as e:  # e.g. pool mode without psycopg 3 / psycopg-pool, or not on PostgreSQL
+                self.stdout.write(f"{mode:<12} unavailable: {e}")
+                continue
+
+            timings.sort()
+            self.stdout.write(
+                f"{mode:<12} {sum(timings) / len(timings) * 1000:>8.2f} {timings[len(timings) // 2] * 1000:>8.2f} "
+                f"{timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000:>8.2f} {connects:>9}"
+            )
+
+    def measure(self, alias, config, query, requests):
+        connection = ConnectionHandler({alias: config})[alias]
+        sql, params = query.sql_with_params()
+        connects = []
+
+        def count(sender, connection, **kwargs):
+            connects.append(connection)
+
+        connection_created.connect(count, weak=False)
+        timings = []
+        try:
+            for _ in range(requests):
+                started = time.perf_counter()
+                connection.close_if_unusable_or_obsolete()  # request_started
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                connection.close_if_unusable_or_obsolete()  # request_finished
+                timings.append(time.perf_counter() - started)
+        finally:
+            connection_created.disconnect(count)
+            connection.close()
+            if hasattr(connection, "close_pool"):
+                connection.close_pool()
+        return timings, len([c for c in connects if c is connection])
@@ -0,0 +1,49 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from myapp.hashers import TunablePBKDF2PasswordHasher, TunableScryptPasswordHasher
+
+
+class Command(BaseCommand):
+    help = (
+        "Time password hashing at several cost settings and show the login throughput "
+        "each leaves per worker process (a login verifies exactly one hash)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=5, help="Hashes timed per setting.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="CPU-bound workers serving logins, for the total column.")
+        parser.add_argument("--pbkdf2-iterations", type=int, nargs="*", default=[100_000, 300_000, 870_000])
+        parser.add_argument("--scrypt-work-factors", type=int, nargs="*", default=[2**13, 2**14, 2**15])
+
+    def handle(self, *args, **options):
+        settings_to_try = [
+            (TunablePBKDF2PasswordHasher(), f"iterations={n}", {"PASSWORD_PBKDF2_ITERATIONS": n}, 0)
+            for n in options["pbkdf2_iterations"]
+        ] + [
+            (TunableScryptPasswordHasher(), f"n={n}", {"PASSWORD_SCRYPT_WORK_FACTOR": n},
+             128 * n * TunableScryptPasswordHasher().block_size)
+            for n in options["scrypt_work_factors"]
+        ]
+
+        self.stdout.write(f"{'hasher':<14} {'cost':<18} {'ms/hash':>9} {'memory':>9} {'logins/s/worker':>16} "
+                          f"{'logins/s x' + str(options['workers']):>14}")
+        for hasher, label, overrides, memory in settings_to_try:
+            with override_settings(**overrides):
+                salt = hasher.salt()
+                hasher.encode("warm-up password", salt)
+                started = time.perf_counter()
+                for _ in range(options["rounds"]):
+                    hasher.encode("correct horse battery staple", salt)
+                seconds = (time.perf_counter() - started) / options["rounds"]
+
+            per_worker = 1 / seconds
+            memory_label = f"{memory / 2**20:.0f}Mi" if memory else "-"
+            self.stdout.write(
+                f"{hasher.algorithm:<14} {label:<18} {seconds * 1000:>9.1f} {memory_label:>9} "
+                f"{per_worker:>16.1f} {per_worker * options['workers']:>14.1f}"
+            )
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from myapp.testing import (
+    QUERY_BUDGETS,
+    FullTableScan,
+    QueryBudgetExceeded,
+    assert_index_scan,
+    assert_query_budget,
+    budget_requests,
+    cold_payload_cache,
+    hot_queries,
+    seed_plan_data,
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset (rolled back afterwards), EXPLAIN the hot lookups of the "
+        "catalog, course, lesson, dashboard, login and video worker paths, and fail if any of them "
+        "scans a whole table or a view exceeds its query budget. On PostgreSQL sequential "
+        "scans are disabled for the check so small seeded tables still report index use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=200)
+        parser.add_argument("--reviews-per-course", type=int, default=20)
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+                seed_plan_data(options["courses"], options["reviews_per_course"])
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                failures = self.check_plans() + self.check_budgets()
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} regressed.")
+        self.stdout.write(self.style.SUCCESS("All hot queries use indexes and stay within their budgets."))
+
+    def check_plans(self):
+        failures = []
+        for name, queryset, index in hot_queries():
+            try:
+                assert_index_scan(queryset, index)
+            except FullTableScan as e:
+                failures.append(name)
+                self.stderr.write(f"FAIL {name}: {e}")
+            else:
+                self.stdout.write(f"ok   {name}")
+        return failures
+
+    def check_budgets(self):
+        failures = []
+        for name, kind, request in budget_requests():
+            label = f"{name} {kind}"
+            cold_payload_cache()
+            try:
+                with assert_query_budget(name):
+                    request()
+            except QueryBudgetExceeded as e:
+                failures.append(label)
+                self.stderr.write(f"FAIL {label}: {e}")
+            else:
+                self.stdout.write(f"ok   {label} ({QUERY_BUDGETS[name]} queries)")
+        return failures
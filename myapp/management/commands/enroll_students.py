@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.enrollment import bulk_enroll, resolve_students
+from myapp.models import Course
+
+
+class Command(BaseCommand):
+    help = "Enroll the students listed in a file (one id, username or email per line) in the given courses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_ids", nargs="+", type=int)
+        parser.add_argument("--students-file", required=True)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, course_ids, students_file, batch_size, **options):
+        try:
+            with open(students_file, encoding="utf-8") as lines:
+                identifiers = [line.strip() for line in lines if line.strip()]
+        except OSError as error:
+            raise CommandError(error)
+
+        found_courses = set(Course.objects.filter(id__in=course_ids).values_list("id", flat=True))
+        missing = sorted(set(course_ids) - found_courses)
+        if missing:
+            raise CommandError(f"Unknown course id(s): {', '.join(map(str, missing))}")
+
+        started = time.perf_counter()
+        student_ids, unknown = resolve_students(identifiers, batch_size)
+        created = bulk_enroll(student_ids, found_courses, batch_size)
+        elapsed = time.perf_counter() - started
+
+        for identifier in unknown:
+            self.stderr.write(f"Unknown student: {identifier}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Enrolled {len(student_ids)} student(s) in {len(found_courses)} course(s): "
+            f"{created} new enrollment(s) in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,33 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.export import EXPORT_CHUNK_SIZE, export_lines, parse_updated_since
+
+
+class Command(BaseCommand):
+    help = "Write the catalog as NDJSON (one course with its modules and lessons per line), as served by /courses/export/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", help="File to write; standard output by default.")
+        parser.add_argument("--updated-since", help="Only courses changed since this ISO 8601 datetime.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, output, updated_since, chunk_size, **options):
+        try:
+            updated_since = parse_updated_since(updated_since) if updated_since else None
+        except ValueError as e:
+            raise CommandError(e)
+
+        started = time.perf_counter()
+        courses = 0
+        stream = open(output, "w", encoding="utf-8") if output else sys.stdout
+        try:
+            for line in export_lines(updated_since, chunk_size):
+                stream.write(line)
+                courses += 1
+        finally:
+            if output:
+                stream.close()
+        self.stderr.write(f"Exported {courses} course(s) in {time.perf_counter() - started:.2f}s.")
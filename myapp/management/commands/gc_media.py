@@ -0,0 +1,80 @@
+import os
+import re
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from myapp.custom_storage import BLOB_NAME_RE, ContentAddressedStorage
+from myapp.models import Course, Lesson, Student
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed media blobs that no model field, image variant or lesson HTML references."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only list what would be deleted.")
+        parser.add_argument("--min-age", type=float, default=24.0,
+                            help="Keep blobs younger than this many hours (uploads not yet attached to a row).")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            self.stderr.write("The default storage is not content-addressed; nothing to collect.")
+            return
+
+        referenced = self.referenced_names()
+        cutoff = time.time() - options["min_age"] * 3600
+        root = default_storage.location
+        removed = freed = 0
+
+        for directory, dirnames, filenames in os.walk(root):
+            relative_dir = os.path.relpath(directory, root)
+            if relative_dir == "hls" or relative_dir.startswith("hls" + os.sep):
+                dirnames[:] = []
+                continue
+
+            staging = relative_dir == ContentAddressedStorage.staging_dir
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, "/")
+                if not staging and (not BLOB_NAME_RE.search(name) or name in referenced):
+                    continue
+                stat = os.stat(path)
+                if stat.st_mtime > cutoff:
+                    continue
+
+                removed += 1
+                freed += stat.st_size
+                self.stdout.write(f"{'Would delete' if options['dry_run'] else 'Deleting'} {name}")
+                if not options["dry_run"]:
+                    os.remove(path)
+
+        verb = "Would free" if options["dry_run"] else "Freed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {freed} bytes in {removed} orphaned file(s)."))
+
+    def referenced_names(self):
+        names = set()
+        for model in apps.get_models():
+            file_fields = [field.name for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+            for field in file_fields:
+                names.update(
+                    model._default_manager.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                    .values_list(field, flat=True).iterator()
+                )
+
+        for variants in (
+            *Course.objects.values_list("course_image_variants", flat=True).iterator(),
+            *Student.objects.values_list("avatar_variants", flat=True).iterator(),
+        ):
+            names.update((variants or {}).get("widths", {}).values())
+
+        # Editor uploads are only referenced by URL from rich-text content.
+        media_url = re.escape(settings.MEDIA_URL)
+        pattern = re.compile(media_url + r"([^\"'\s)?#]+)")
+        for model, field in ((Lesson, "content"), (Course, "description")):
+            for html in model.objects.exclude(**{f"{field}__isnull": True}).values_list(field, flat=True).iterator():
+                names.update(pattern.findall(html))
+        return names
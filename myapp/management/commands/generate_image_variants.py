@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from myapp.images import build_variants, needs_variants
+from myapp.models import Course, Student
+from myapp.signals import course_content_changed
+
+
+class Command(BaseCommand):
+    help = "Build the resized WebP derivatives of course images and avatars that are missing or stale."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild derivatives even if they look current.")
+
+    def handle(self, *args, **options):
+        courses = self._backfill(Course, "course_image", "course_image_variants", options["force"])
+        course_content_changed(*courses)
+        students = self._backfill(Student, "avatar", "avatar_variants", options["force"])
+        course_content_changed(*Course.objects.filter(author__user__in=students).values_list("id", flat=True))
+        self.stdout.write(self.style.SUCCESS(
+            f"Built variants for {len(courses)} course image(s) and {len(students)} avatar(s)."
+        ))
+
+    def _backfill(self, model, image_field, variants_field, force):
+        updated = []
+        rows = model.objects.exclude(**{image_field: ""}).exclude(**{f"{image_field}__isnull": True})
+        for instance in rows.only("id", image_field, variants_field).iterator(chunk_size=200):
+            image, variants = getattr(instance, image_field), getattr(instance, variants_field)
+            if force or needs_variants(image, variants):
+                model.objects.filter(pk=instance.pk).update(**{variants_field: build_variants(image)})
+                updated.append(instance.pk)
+        return updated
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.cache import NAMESPACES
+
+
+class Command(BaseCommand):
+    help = (
+        "Invalidate cached payloads by namespace (all of them by default), e.g. after a "
+        "deploy that changes how courses are serialized."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("namespaces", nargs="*", metavar="namespace", help=f"One of: {', '.join(sorted(NAMESPACES))}.")
+
+    def handle(self, *args, namespaces, **options):
+        unknown = sorted(set(namespaces) - set(NAMESPACES))
+        if unknown:
+            raise CommandError(f"Unknown cache namespace(s): {', '.join(unknown)}")
+        for name in namespaces or sorted(NAMESPACES):
+            NAMESPACES[name].invalidate()
+            self.stdout.write(f"Invalidated {name}")
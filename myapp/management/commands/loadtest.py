@@ -0,0 +1,116 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Send concurrent GET requests to an endpoint and report throughput and latency per "
+        "concurrency level. With --compare, start one single-worker gunicorn per SERVER_PROFILE "
+        "(wsgi, then asgi) on this checkout and load both the same way, to compare how much "
+        "concurrency one process sustains."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", help="A URL, or with --compare a path such as /courses/.")
+        parser.add_argument("--compare", action="store_true")
+        parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 8, 32, 64])
+        parser.add_argument("--requests", type=int, default=400, help="Requests per concurrency level.")
+        parser.add_argument("--token", help="Access token sent as 'Authorization: Bearer <token>'.")
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, target, compare, **options):
+        if not compare:
+            self.write_header()
+            self.load("-", target, **options)
+            return
+
+        if not target.startswith("/"):
+            raise CommandError("With --compare the target is a path, e.g. /courses/.")
+        self.write_header()
+        for profile in ("wsgi", "asgi"):
+            with self.server(profile) as base_url:
+                self.load(profile, base_url + target, **options)
+
+    def write_header(self):
+        self.stdout.write(f"{'profile':<8} {'concurrency':>11} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+                          f"{'p99 ms':>8} {'errors':>7}")
+
+    def load(self, profile, url, concurrency, requests, token, timeout, **options):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+        def fetch(_):
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+                    response.read()
+                ok = True
+            except urllib.error.HTTPError as e:
+                ok = e.code < 400
+            except OSError:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        for _ in range(5):  # warm caches and connections
+            fetch(None)
+
+        for level in concurrency:
+            with ThreadPoolExecutor(level) as pool:
+                started = time.perf_counter()
+                results = list(pool.map(fetch, range(requests)))
+                elapsed = time.perf_counter() - started
+
+            latencies = sorted(seconds * 1000 for seconds, _ in results)
+            errors = sum(not ok for _, ok in results)
+            self.stdout.write(
+                f"{profile:<8} {level:>11} {requests / elapsed:>9.1f} {percentile(latencies, 0.5):>8.1f} "
+                f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} {errors:>7}"
+            )
+
+    @contextmanager
+    def server(self, profile):
+        port = free_port()
+        env = {**os.environ, "SERVER_PROFILE": profile, "WEB_CONCURRENCY": "1", "GUNICORN_THREADS": "1"}
+        command = [sys.executable, "-m", "gunicorn", "-c", str(settings.BASE_DIR / "gunicorn.conf.py"),
+                   "--bind", f"127.0.0.1:{port}"]
+        with tempfile.TemporaryFile() as log:
+            process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=log)
+            try:
+                self.wait_until_listening(process, port, log)
+                yield f"http://127.0.0.1:{port}"
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+    def wait_until_listening(self, process, port, log, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"gunicorn exited with {process.returncode}:\n{log.read().decode(errors='replace')}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn did not start listening on port {port} within {timeout}s.")
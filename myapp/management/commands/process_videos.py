@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from myapp.models import Lesson
+from myapp.video_processing import claim_next_lesson, process_lesson_video
+
+
+class Command(BaseCommand):
+    help = "Transcode uploaded lesson videos into HLS renditions (run as a long-lived worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep when idle.")
+        parser.add_argument("--requeue", nargs="*", type=int, metavar="LESSON_ID",
+                            help="Mark these lessons (or all failed ones if none given) pending again.")
+
+    def handle(self, *args, **options):
+        if options["requeue"] is not None:
+            lessons = Lesson.objects.exclude(uploaded_video="").exclude(uploaded_video__isnull=True)
+            if options["requeue"]:
+                lessons = lessons.filter(id__in=options["requeue"])
+            else:
+                lessons = lessons.filter(video_status=Lesson.VIDEO_FAILED)
+            count = lessons.update(video_status=Lesson.VIDEO_PENDING, video_error="")
+            self.stdout.write(f"Requeued {count} lesson(s).")
+
+        while True:
+            close_old_connections()
+            lesson_id = claim_next_lesson()
+            if lesson_id is None:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+
+            self.stdout.write(f"Processing lesson {lesson_id}...")
+            if process_lesson_video(lesson_id):
+                self.stdout.write(self.style.SUCCESS(f"Lesson {lesson_id} is ready."))
+            else:
+                self.stdout.write(self.style.ERROR(f"Lesson {lesson_id} failed or was replaced."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from myapp.revocation import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete revocations of tokens past their expiry (run periodically, e.g. hourly from cron)."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired token revocation(s)."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import Course
+from myapp.search import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents (and PostgreSQL search vectors) of courses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_ids", nargs="*", type=int, help="Limit to these course ids.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        course_ids = options["course_ids"] or list(Course.objects.values_list("id", flat=True))
+        refresh_search_documents(course_ids, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search documents for {len(course_ids)} course(s)."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import Course
+from myapp.signals import course_content_changed
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized lesson counts and module durations of courses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_ids", nargs="*", type=int, help="Limit to these course ids.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        changed = Course.recompute_totals(options["course_ids"] or None, batch_size=options["batch_size"])
+        course_content_changed(*changed)
+        self.stdout.write(self.style.SUCCESS(f"Repaired lesson/duration totals for {len(changed)} course(s)."))
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:04
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Course = apps.get_model('myapp', 'Course')
+    Review = apps.get_model('myapp', 'Review')
+    stats = (
+        Review.objects.values('course_id')
+        .annotate(
+            rating_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{f'rating_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)},
+        )
+        .order_by()
+    )
+    for row in stats:
+        Course.objects.filter(pk=row.pop('course_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_remove_author_published_courses_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='hls_manifest',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='video_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='video_status',
+            field=models.CharField(choices=[('none', 'No upload'), ('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=10),
+        ),
+    ]
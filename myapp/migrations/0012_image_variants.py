@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_lesson_video_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='course_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:10
+
+import re
+
+from django.db import migrations, models
+from django.db.models import Count
+
+MODULE_DURATION_RE = re.compile(r'^(?P<value>([1-9]|[1-2][0-9]|30)) (?P<unit>(hour|minute|hours|minutes))$')
+
+
+def populate_course_totals(apps, schema_editor):
+    Course = apps.get_model('myapp', 'Course')
+    Module = apps.get_model('myapp', 'Module')
+    Lesson = apps.get_model('myapp', 'Lesson')
+
+    totals = {}
+    for course_id, duration in Module.objects.values_list('course_id', 'duration'):
+        match = MODULE_DURATION_RE.match(duration or '')
+        minutes = int(match['value']) * (60 if match['unit'].startswith('hour') else 1) if match else 0
+        totals.setdefault(course_id, [0, 0])[1] += minutes
+    lessons = Lesson.objects.values('module__course_id').annotate(total=Count('id')).order_by()
+    for row in lessons:
+        totals.setdefault(row['module__course_id'], [0, 0])[0] = row['total']
+
+    for course_id, (total_lessons, total_module_minutes) in totals.items():
+        Course.objects.filter(pk=course_id).update(
+            total_lessons=total_lessons, total_module_minutes=total_module_minutes
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='total_lessons',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='total_module_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_course_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,109 @@
+import re
+
+import django.core.validators
+import myapp.models
+from django.db import migrations, models
+
+UNIT_MINUTES = {'week': 10080, 'day': 1440, 'hour': 60, 'minute': 1}
+# What the string-era validators accepted, in any letter case.
+COURSE_DURATION_RE = re.compile(r'^(?P<value>[1-9]|[1-2][0-9]|30)\s+(?P<unit>weeks?|days?)$', re.IGNORECASE)
+MODULE_DURATION_RE = re.compile(r'^(?P<value>[1-9]|[1-2][0-9]|30)\s+(?P<unit>hours?|minutes?)$', re.IGNORECASE)
+
+
+def to_minutes(value, pattern):
+    """The minutes in ``value`` ("3 weeks", "1 Day"), or None when it doesn't parse."""
+    match = pattern.match((value or '').strip())
+    return int(match['value']) * UNIT_MINUTES[match['unit'].lower().rstrip('s')] if match else None
+
+
+def to_text(minutes):
+    for unit, size in UNIT_MINUTES.items():
+        if minutes % size == 0:
+            value = minutes // size
+            return f"{value} {unit}{'' if value == 1 else 's'}"
+
+
+def parse_durations(apps, schema_editor):
+    parsed, unparsed = [], []
+    for model_name, pattern in (('Course', COURSE_DURATION_RE), ('Module', MODULE_DURATION_RE)):
+        model = apps.get_model('myapp', model_name)
+        rows = list(model.objects.only('id', 'duration'))
+        for row in rows:
+            row.duration_minutes = to_minutes(row.duration, pattern)
+            if row.duration_minutes is None:
+                unparsed.append(f"{model_name} {row.pk}: {row.duration!r}")
+        parsed.append((model, rows))
+    # Nothing is guessed: fix these rows by hand and migrate again.
+    if unparsed:
+        raise ValueError("Unreadable durations:\n" + "\n".join(unparsed))
+    for model, rows in parsed:
+        model.objects.bulk_update(rows, ['duration_minutes'], batch_size=500)
+
+
+def format_durations(apps, schema_editor):
+    for model_name in ('Course', 'Module'):
+        model = apps.get_model('myapp', model_name)
+        rows = list(model.objects.only('id', 'duration_minutes'))
+        for row in rows:
+            row.duration = to_text(row.duration_minutes)
+        model.objects.bulk_update(rows, ['duration'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_course_totals'),
+    ]
+
+    operations = [
+        # Nullable while both columns exist, so the migration can also run backwards.
+        migrations.AlterField(
+            model_name='course',
+            name='duration',
+            field=models.CharField(max_length=20, null=True, validators=[myapp.models.validate_course_duration]),
+        ),
+        migrations.AlterField(
+            model_name='module',
+            name='duration',
+            field=models.CharField(max_length=20, null=True, validators=[myapp.models.validate_module_duration]),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.RunPython(parse_durations, format_durations),
+        migrations.RemoveField(
+            model_name='course',
+            name='duration',
+        ),
+        migrations.RemoveField(
+            model_name='module',
+            name='duration',
+        ),
+        migrations.RenameField(
+            model_name='course',
+            old_name='duration_minutes',
+            new_name='duration',
+        ),
+        migrations.RenameField(
+            model_name='module',
+            old_name='duration_minutes',
+            new_name='duration',
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='duration',
+            field=models.PositiveIntegerField(db_index=True, help_text='Minutes', validators=[django.core.validators.MinValueValidator(1440), django.core.validators.MaxValueValidator(302400)]),
+        ),
+        migrations.AlterField(
+            model_name='module',
+            name='duration',
+            field=models.PositiveIntegerField(help_text='Minutes', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1800)]),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_duration_minutes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['level', 'id'], name='course_level_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['module', 'id'], name='lesson_module_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('video_status', 'pending')), fields=['id'], name='lesson_pending_video_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['course', '-created_at', '-id'], name='review_course_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['course', 'rating', '-created_at', '-id'], name='review_course_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:17
+
+from collections import defaultdict
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+
+def populate_search(apps, schema_editor):
+    Course = apps.get_model('myapp', 'Course')
+    Lesson = apps.get_model('myapp', 'Lesson')
+
+    documents = defaultdict(list)
+    lessons = Lesson.objects.order_by('module_id', 'id').values_list('module__course_id', 'name', 'content')
+    for course_id, name, content in lessons.iterator():
+        documents[course_id].append(name)
+        if content:
+            documents[course_id].append(strip_tags(content))
+    courses = [Course(id=course_id, search_document='\n'.join(parts)) for course_id, parts in documents.items()]
+    Course.objects.bulk_update(courses, ['search_document'], batch_size=500)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        config = getattr(settings, 'SEARCH_CONFIG', 'english')
+        Course.objects.update(search_vector=(
+            SearchVector('title', weight='A', config=config)
+            + SearchVector('description', weight='B', config=config)
+            + SearchVector('search_document', weight='C', config=config)
+        ))
+
+
+# GIN is PostgreSQL-only, so the index is created here rather than in Course.Meta.
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS course_search_vector_idx ON myapp_course USING gin (search_vector)'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS course_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search, migrations.RunPython.noop),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='myapp.course')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='myapp.lesson')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='myapp.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'course'], name='completion_student_course_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'lesson'), name='lesson_completion_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0018_lesson_completions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('video_status', 'processing')), fields=['updated_at'], name='lesson_processing_video_idx'),
+        ),
+    ]
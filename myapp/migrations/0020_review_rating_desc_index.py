@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0019_stale_video_claims'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_course_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['course', '-rating', '-created_at', '-id'], name='review_course_rating_idx'),
+        ),
+    ]
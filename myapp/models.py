@@ -1,19 +1,62 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DEFERRED, Count, F, Q, Sum
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.hashers import make_password, check_password
 import re
 
 
+# Durations are stored as whole minutes; these parse and render the "3 weeks" form.
+UNIT_MINUTES = {"week": 7 * 24 * 60, "day": 24 * 60, "hour": 60, "minute": 1}
+COURSE_DURATION_RE = re.compile(r'^(?P<value>([1-9]|[1-2][0-9]|30)) (?P<unit>(week|day|weeks|days))$')
+MODULE_DURATION_RE = re.compile(r'^(?P<value>([1-9]|[1-2][0-9]|30)) (?P<unit>(hour|minute|hours|minutes))$')
+COURSE_DURATION_ERROR = "Enter a valid duration (e.g., '3 weeks' or '1 day')."
+MODULE_DURATION_ERROR = "Enter a valid duration (e.g., '2 hours' or '15 minutes')."
+
+
+def _parse_duration(value, pattern, message):
+    match = pattern.match(str(value).strip())
+    if not match:
+        raise ValidationError(message)
+    return int(match["value"]) * UNIT_MINUTES[match["unit"].rstrip("s")]
+
+
+def parse_course_duration(value):
+    return _parse_duration(value, COURSE_DURATION_RE, COURSE_DURATION_ERROR)
+
+
+def parse_module_duration(value):
+    return _parse_duration(value, MODULE_DURATION_RE, MODULE_DURATION_ERROR)
+
+
+def format_duration(minutes):
+    if not minutes:
+        return None
+    for unit, size in UNIT_MINUTES.items():
+        if minutes % size == 0:
+            value = minutes // size
+            return f"{value} {unit}{'' if value == 1 else 's'}"
+
+
+# Kept for migrations that still reference the string-era validators.
 def validate_course_duration(value):
-    pattern = r'^(?P<value>([1-9]|[1-2][0-9]|30)) (?P<unit>(week|day|weeks|days))$'
-    if not re.match(pattern, value):
-        raise ValidationError("Enter a valid duration (e.g., '3 weeks' or '1 day').")
+    parse_course_duration(value)
 
 
 def validate_module_duration(value):
-    pattern = r'^(?P<value>([1-9]|[1-2][0-9]|30)) (?P<unit>(hour|minute|hours|minutes))$'
-    if not re.match(pattern, value):
-        raise ValidationError("Enter a valid duration (e.g., '2 hours' or '15 minutes').")
+    parse_module_duration(value)
+
+
+def in_batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 class Student(models.Model):
@@ -28,6 +71,7 @@ class Student(models.Model):
     password = models.CharField(max_length=128)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default="guest")
     avatar = models.ImageField(upload_to="avatars/", null=True, blank=True)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     about = models.TextField(max_length=500, null=True, blank=True, default="")
     birthday = models.DateField(null=True, blank=True)
     phone_number = models.CharField(max_length=15, null=True, blank=True)
@@ -39,10 +83,17 @@ class Student(models.Model):
         self.password = make_password(raw_password)
 
     def check_password(self, raw_password):
-        return check_password(raw_password, self.password)
+        def setter(raw_password):
+            # Upgrade hashes made with another hasher or an older cost setting.
+            self.set_password(raw_password)
+            self.save(update_fields=["password"])
+
+        return check_password(raw_password, self.password, setter)
 
     def is_enrolled(self, course):
-        return self.enrolled_courses.filter(id=course.id).exists()
+        from .enrollment import enrolled_course_ids
+
+        return getattr(course, "id", course) in enrolled_course_ids(self.id)
 
     def __str__(self):
         return f"{self.username} ({self.role})"
@@ -66,14 +117,131 @@ class Course(models.Model):
         ("expert", "Expert"),
     ]
     description = models.TextField()
-    duration = models.CharField(max_length=20, validators=[validate_course_duration])
+    duration = models.PositiveIntegerField(
+        help_text="Minutes",
+        db_index=True,
+        validators=[MinValueValidator(UNIT_MINUTES["day"]), MaxValueValidator(30 * UNIT_MINUTES["week"])],
+    )
     level = models.CharField(max_length=50, choices=LEVEL_CHOICES, default="all")
     course_image = models.ImageField(upload_to="course_images/", null=True, blank=True)
+    course_image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Also touched when modules, lessons, reviews or the author change (see signals).
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def clean(self):
-        pattern = r'^(?P<value>([1-9]|[1-2][0-9]|30)) (?P<unit>(week|day|weeks|days))$'
-        if not re.match(pattern, self.duration):
-            raise ValidationError("Enter a valid duration (e.g., '3 weeks' or '1 day').")
+    # Denormalized from Review, maintained by Review.save and the post_delete signal.
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    RATING_FIELDS = ("rating_count", "rating_sum", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5")
+
+    # Denormalized from Module/Lesson, maintained by signals (batched via batch_course_updates).
+    total_lessons = models.PositiveIntegerField(default=0)
+    total_module_minutes = models.PositiveIntegerField(default=0)
+
+    TOTAL_FIELDS = ("total_lessons", "total_module_minutes")
+
+    # Lesson names and text, kept by myapp.search; search_vector (PostgreSQL only) also
+    # weighs in title and description and has a GIN index created by migration 0016.
+    search_document = models.TextField(blank=True, default="", editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Catalog: ?level= filter paged by id.
+            models.Index(fields=["level", "id"], name="course_level_id_idx"),
+        ]
+
+    @property
+    def rating_average(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+
+    @property
+    def rating_histogram(self):
+        return {str(star): getattr(self, f"rating_{star}") for star in range(1, 6)}
+
+    @classmethod
+    def adjust_rating(cls, course_id, rating, delta):
+        cls.objects.filter(pk=course_id).update(**{
+            "rating_count": F("rating_count") + delta,
+            "rating_sum": F("rating_sum") + delta * rating,
+            f"rating_{rating}": F(f"rating_{rating}") + delta,
+        })
+
+    @classmethod
+    def recompute_ratings(cls, course_ids=None, batch_size=500):
+        """Rebuilds the rating aggregates from Review rows; returns the ids that had drifted."""
+        courses = cls.objects.only("id", *cls.RATING_FIELDS).order_by("id")
+        if course_ids is not None:
+            courses = courses.filter(id__in=course_ids)
+
+        changed = []
+        for batch in in_batches(courses.iterator(chunk_size=batch_size), batch_size):
+            changed += cls._apply_rating_stats(batch)
+        return changed
+
+    @classmethod
+    def _apply_rating_stats(cls, courses):
+        stats = {
+            row.pop("course_id"): row
+            for row in Review.objects.filter(course_id__in=[course.id for course in courses])
+            .values("course_id")
+            .annotate(
+                rating_count=Count("id"),
+                rating_sum=Sum("rating"),
+                **{f"rating_{star}": Count("id", filter=Q(rating=star)) for star in range(1, 6)},
+            )
+            .order_by()
+        }
+
+        changed = []
+        for course in courses:
+            row = stats.get(course.id, {})
+            values = {field: row.get(field) or 0 for field in cls.RATING_FIELDS}
+            if any(getattr(course, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(course, field, value)
+                changed.append(course)
+        if changed:
+            cls.objects.bulk_update(changed, cls.RATING_FIELDS)
+        return [course.id for course in changed]
+
+    @classmethod
+    def recompute_totals(cls, course_ids=None, batch_size=500):
+        """Recounts lessons and module minutes per course; returns the ids that had drifted."""
+        courses = cls.objects.only("id", *cls.TOTAL_FIELDS).order_by("id")
+        if course_ids is not None:
+            courses = courses.filter(id__in=course_ids)
+
+        changed = []
+        for batch in in_batches(courses.iterator(chunk_size=batch_size), batch_size):
+            ids = [course.id for course in batch]
+            lessons = dict(
+                Lesson.objects.filter(module__course_id__in=ids)
+                .values("module__course_id").annotate(total=Count("id")).order_by()
+                .values_list("module__course_id", "total")
+            )
+            minutes = dict(
+                Module.objects.filter(course_id__in=ids)
+                .values("course_id").annotate(total=Sum("duration")).order_by()
+                .values_list("course_id", "total")
+            )
+
+            drifted = []
+            for course in batch:
+                values = {"total_lessons": lessons.get(course.id, 0), "total_module_minutes": minutes.get(course.id) or 0}
+                if any(getattr(course, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(course, field, value)
+                    drifted.append(course)
+            if drifted:
+                cls.objects.bulk_update(drifted, cls.TOTAL_FIELDS)
+            changed += [course.id for course in drifted]
+        return changed
 
     def __str__(self):
         return self.title
@@ -95,16 +263,17 @@ class AuthorCourse(models.Model):
 class Module(models.Model):
     module = models.CharField(max_length=200)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="modules")
-    duration = models.CharField(max_length=20, validators=[validate_module_duration])
-
-    def clean(self):
-        pattern = r'^(?P<value>([1-9]|[1-2][0-9]|30)) (?P<unit>(hour|minute|hours|minutes))$'
-        if not re.match(pattern, self.duration):
-            raise ValidationError("Enter a valid duration (e.g., '2 hours' or '15 minutes').")
+    duration = models.PositiveIntegerField(
+        help_text="Minutes",
+        validators=[MinValueValidator(1), MaxValueValidator(30 * UNIT_MINUTES["hour"])],
+    )
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted = (instance.__dict__.get("course_id"), instance.__dict__.get("duration"))
+        return instance
 
     def __str__(self):
         return f"{self.module} - {self.course.title}"
@@ -117,6 +286,40 @@ class Lesson(models.Model):
     video_url = models.URLField(blank=True, null=True)
     uploaded_video = models.FileField(upload_to="lesson_videos/", blank=True, null=True)
     content = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["module", "id"], name="lesson_module_id_idx"),
+            # The process_videos worker polls for the (few) pending uploads.
+            models.Index(fields=["id"], condition=Q(video_status="pending"), name="lesson_pending_video_idx"),
+            # ...and for claims left behind by a worker that died (see requeue_stale_claims).
+            models.Index(fields=["updated_at"], condition=Q(video_status="processing"), name="lesson_processing_video_idx"),
+        ]
+
+    VIDEO_NONE = "none"
+    VIDEO_PENDING = "pending"
+    VIDEO_PROCESSING = "processing"
+    VIDEO_READY = "ready"
+    VIDEO_FAILED = "failed"
+    VIDEO_STATUS_CHOICES = [
+        (VIDEO_NONE, "No upload"),
+        (VIDEO_PENDING, "Pending"),
+        (VIDEO_PROCESSING, "Processing"),
+        (VIDEO_READY, "Ready"),
+        (VIDEO_FAILED, "Failed"),
+    ]
+    # HLS renditions of uploaded_video, produced by the process_videos worker.
+    video_status = models.CharField(max_length=10, choices=VIDEO_STATUS_CHOICES, default=VIDEO_NONE)
+    hls_manifest = models.CharField(max_length=255, blank=True, default="")
+    video_error = models.TextField(blank=True, default="")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_video = instance.__dict__.get("uploaded_video", DEFERRED)
+        instance._counted_module_id = instance.__dict__.get("module_id")
+        return instance
 
     def clean(self):
         if self.video_url and self.uploaded_video:
@@ -126,12 +329,14 @@ class Lesson(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
+        loaded_video = getattr(self, "_loaded_video", None)
+        if loaded_video is not DEFERRED and (self.uploaded_video.name or None) != (loaded_video or None):
+            # A new upload invalidates the renditions and queues it for transcoding. hls_manifest
+            # is kept (but not served) so that publishing the new renditions deletes the old ones.
+            self.video_status = self.VIDEO_PENDING if self.uploaded_video else self.VIDEO_NONE
+            self.video_error = ""
         super().save(*args, **kwargs)
-        self.module.course.update_total_lessons()
-
-    def delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
-        self.module.course.update_total_lessons()
+        self._loaded_video = self.uploaded_video.name
 
     def __str__(self):
         return f"{self.name} - {self.module.module}"
@@ -147,10 +352,67 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ("user", "course")
+        indexes = [
+            # Review pages of a course, see REVIEW_ORDERINGS in views.
+            models.Index(fields=["course", "-created_at", "-id"], name="review_course_created_idx"),
+            models.Index(fields=["course", "-rating", "-created_at", "-id"], name="review_course_rating_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted_rating = (instance.__dict__.get("course_id"), instance.__dict__.get("rating"))
+        return instance
 
     def clean(self):
         if not self.user.is_enrolled(self.course):
             raise ValidationError("You must be enrolled in this course to leave a review.")
 
+    def save(self, *args, **kwargs):
+        self.rating = int(self.rating)
+        with transaction.atomic():
+            previous = getattr(self, "_counted_rating", (None, None))
+            if None in previous and self.pk is not None:  # not loaded from the database, maybe not new
+                previous = Review.objects.filter(pk=self.pk).values_list("course_id", "rating").first() or previous
+            super().save(*args, **kwargs)
+            current = (self.course_id, self.rating)
+            if previous != current:
+                if None not in previous:
+                    Course.adjust_rating(*previous, -1)
+                Course.adjust_rating(*current, 1)
+        self._counted_rating = current
+
     def __str__(self):
         return f"{self.user.username} - {self.course.title} ({self.rating}/5) ⭐"
+
+
+class LessonCompletion(models.Model):
+    """A lesson a student has finished; ``course`` is denormalized from the lesson for progress rollups."""
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="completions")
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="completions")
+    # Kept in step with the lesson's course when lessons or modules move (see signals).
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="completions")
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "lesson"], name="lesson_completion_unique"),
+        ]
+        indexes = [
+            # Dashboard: completed lessons per (student, course).
+            models.Index(fields=["student", "course"], name="completion_student_course_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.lesson_id}"
+
+
+class RevokedToken(models.Model):
+    """A logged-out or rotated JWT, kept only until the token would have expired anyway."""
+
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
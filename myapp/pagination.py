@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _resolve(row, field):
+    value = row
+    for part in field.split('__'):
+        value = value[part] if isinstance(value, dict) else getattr(value, part)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor.")
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        raise InvalidCursor("Invalid cursor.")
+    return values
+
+
+def _ordering_field(model, name):
+    field = None
+    for part in name.split('__'):
+        field = model._meta.get_field(part)
+        model = field.related_model
+    if field.is_relation:
+        field = field.target_field
+    return field
+
+
+def coerce_cursor(model, ordering, values):
+    """Converts decoded cursor values to their ordering fields' types; raises ``InvalidCursor``."""
+    coerced = []
+    for field, value in zip(ordering, values):
+        try:
+            field = _ordering_field(model, field.lstrip('-'))
+        except FieldDoesNotExist:  # an annotation; left to the caller
+            coerced.append(value)
+            continue
+        try:
+            coerced.append(field.to_python(value))
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor.")
+    return coerced
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    params = getattr(request, 'query_params', request.GET)
+    try:
+        size = int(params.get('page_size', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def keyset_filter(ordering, values):
+    # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y), per-field direction aware.
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _page_query(queryset, ordering, cursor, page_size):
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = coerce_cursor(queryset.model, ordering, decode_cursor(cursor, len(ordering)))
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    return queryset[:page_size + 1]
+
+
+def _split_page(rows, ordering, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([_resolve(rows[-1], field.lstrip('-')) for field in ordering])
+    return rows, next_cursor
+
+
+def paginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Keyset pagination: ``ordering`` must end in a unique column (usually ``id``)
+    so that every page is a single indexed range scan, independent of depth.
+    """
+    return _split_page(list(_page_query(queryset, ordering, cursor, page_size)), ordering, page_size)
+
+
+async def apaginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    rows = [row async for row in _page_query(queryset, ordering, cursor, page_size)]
+    return _split_page(rows, ordering, page_size)
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import RevokedToken
+
+def _key(jti):
+    return f"jwt:revoked:{jti}"
+
+
+def revoke(jti, exp):
+    """Revokes a token until its ``exp`` (epoch seconds): one INSERT and one cache write."""
+    remaining = exp - timezone.now().timestamp()
+    if remaining <= 0:
+        return
+    RevokedToken.objects.bulk_create(
+        [RevokedToken(jti=jti, expires_at=datetime.fromtimestamp(exp, tz=dt_timezone.utc))], ignore_conflicts=True
+    )
+    cache.set(_key(jti), True, timeout=remaining)
+
+
+def is_revoked(jti):
+    """
+    A cache hit answers without a query. A miss is checked against ``RevokedToken``,
+    since the cache may be per-process or have evicted the key; callers only ask
+    when a token is (re)validated.
+    """
+    if cache.get(_key(jti)) is not None:
+        return True
+    expires_at = (
+        RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now())
+        .values_list("expires_at", flat=True).first()
+    )
+    if expires_at is None:
+        return False
+    cache.set(_key(jti), True, timeout=(expires_at - timezone.now()).total_seconds())
+    return True
+
+
+def purge_expired():
+    """Deletes revocations of tokens that have expired anyway; returns how many."""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,245 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Concat
+from django.utils.html import escape, strip_tags
+
+from .cache import bump_version, get_version
+from .models import Course, Lesson, in_batches
+from .pagination import DEFAULT_PAGE_SIZE, InvalidCursor, decode_cursor, encode_cursor
+
+SEARCH_VERSION_KEY = "search:version"
+TOKEN_RE = re.compile(r"\w+")
+SNIPPET_LENGTH = 200
+# ts_headline returns the text unescaped, so matches are delimited with control
+# characters that highlight() turns into <mark> tags once the text is escaped.
+HIGHLIGHT_START, HIGHLIGHT_STOP = "\x02", "\x03"
+HIGHLIGHT_OPTIONS = {"start_sel": HIGHLIGHT_START, "stop_sel": HIGHLIGHT_STOP}
+
+# Relative weight of each field, as PostgreSQL's A/B/C labels in search_vector.
+FIELD_WEIGHTS = (("title", "A", 1.0), ("description", "B", 0.4), ("search_document", "C", 0.2))
+
+
+def uses_postgres():
+    return connection.vendor == "postgresql"
+
+
+def search_config():
+    return getattr(settings, "SEARCH_CONFIG", "english")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(strip_tags(text or "").lower())
+
+
+def search_vector():
+    vector = None
+    for field, label, _ in FIELD_WEIGHTS:
+        part = SearchVector(field, weight=label, config=search_config())
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def refresh_search_documents(course_ids, batch_size=500):
+    """Rebuilds ``search_document`` (and ``search_vector`` on PostgreSQL) for these courses."""
+    for ids in in_batches(course_ids, batch_size):
+        documents = defaultdict(list)
+        lessons = Lesson.objects.filter(module__course_id__in=ids).order_by("module_id", "id")
+        for course_id, name, content in lessons.values_list("module__course_id", "name", "content").iterator():
+            documents[course_id].append(name)
+            if content:
+                documents[course_id].append(strip_tags(content))
+
+        courses = [Course(id=course_id, search_document="\n".join(documents[course_id])) for course_id in ids]
+        Course.objects.bulk_update(courses, ["search_document"])
+        if uses_postgres():
+            Course.objects.filter(pk__in=ids).update(search_vector=search_vector())
+    bump_version(SEARCH_VERSION_KEY)
+
+
+_pending = threading.local()
+_deferred = ContextVar("deferred_search_refresh", default=None)
+
+
+@contextmanager
+def defer_search_refresh():
+    """Collects refreshes requested inside the block and issues them once on exit."""
+    if _deferred.get() is not None:
+        yield
+        return
+    deferred = set()
+    token = _deferred.set(deferred)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+    search_content_changed(*deferred)
+
+
+def _flush_pending():
+    course_ids, _pending.course_ids = getattr(_pending, "course_ids", set()), set()
+    if course_ids:
+        refresh_search_documents(course_ids)
+
+
+def search_content_changed(*course_ids):
+    """
+    Refreshes the search documents once the current transaction commits, so a
+    cascade or an admin formset that touches many lessons costs one refresh.
+    """
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if not course_ids:
+        return
+    deferred = _deferred.get()
+    if deferred is not None:
+        deferred.update(course_ids)
+        return
+    if not hasattr(_pending, "course_ids"):
+        _pending.course_ids = set()
+    _pending.course_ids.update(course_ids)
+    transaction.on_commit(_flush_pending)
+
+
+class InvertedIndex:
+    """Process-local term -> {course id: weighted frequency} index, the fallback off PostgreSQL."""
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        self.size = 0
+        for course_id, *texts in rows:
+            self.size += 1
+            for (_, _, weight), text in zip(FIELD_WEIGHTS, texts):
+                for term, count in Counter(tokenize(text)).items():
+                    postings = self.postings[term]
+                    postings[course_id] = postings.get(course_id, 0) + weight * count
+
+    def search(self, query):
+        """Returns ``(score, course_id)`` pairs of courses containing every query term, best first."""
+        terms = set(tokenize(query))
+        postings = sorted((self.postings.get(term, {}) for term in terms), key=len)
+        if not postings or not postings[0]:
+            return []
+
+        idf = [math.log(1 + self.size / len(posting)) for posting in postings]
+        hits = []
+        for course_id in postings[0]:
+            if all(course_id in posting for posting in postings[1:]):
+                score = sum(posting[course_id] * weight for posting, weight in zip(postings, idf))
+                hits.append((round(score, 6), course_id))
+        hits.sort(key=lambda hit: (-hit[0], hit[1]))
+        return hits
+
+
+_index = (None, None)
+_index_lock = threading.Lock()
+
+
+def get_index():
+    # Shared by the threads of a process; rebuilt after any worker refreshed a document.
+    global _index
+    version = get_version(SEARCH_VERSION_KEY)
+    if _index[0] != version:
+        with _index_lock:
+            if _index[0] != version:
+                rows = Course.objects.values_list("id", *(field for field, _, _ in FIELD_WEIGHTS)).iterator()
+                _index = (version, InvertedIndex(rows))
+    return _index[1]
+
+
+def _check_cursor(cursor):
+    rank, course_id = decode_cursor(cursor, 2)
+    if not isinstance(rank, (int, float)) or not isinstance(course_id, int):
+        raise InvalidCursor("Invalid cursor.")
+    return rank, course_id
+
+
+def search_courses(query, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Ranked keyset page of ``(course_id, rank)`` matching ``query``, plus the next
+    cursor. PostgreSQL ranks with ts_rank over the GIN-indexed search_vector.
+    """
+    after = _check_cursor(cursor) if cursor else None
+
+    if uses_postgres():
+        search_query = SearchQuery(query, config=search_config(), search_type="websearch")
+        hits = (
+            Course.objects.filter(search_vector=search_query)
+            .annotate(rank=Cast(SearchRank(F("search_vector"), search_query), FloatField()))
+            .order_by("-rank", "id")
+        )
+        if after:
+            hits = hits.filter(Q(rank__lt=after[0]) | Q(rank=after[0], id__gt=after[1]))
+        hits = [(rank, course_id) for course_id, rank in hits.values_list("id", "rank")[:page_size + 1]]
+    else:
+        hits = get_index().search(query)
+        if after:
+            hits = [hit for hit in hits if (-hit[0], hit[1]) > (-after[0], after[1])]
+        hits = hits[:page_size + 1]
+
+    next_cursor = encode_cursor(hits[page_size - 1]) if len(hits) > page_size else None
+    return [(course_id, rank) for rank, course_id in hits[:page_size]], next_cursor
+
+
+def filter_courses(queryset, query):
+    """Unranked match filter, e.g. for the admin changelist search."""
+    if uses_postgres():
+        return queryset.filter(search_vector=SearchQuery(query, config=search_config(), search_type="websearch"))
+    return queryset.filter(id__in=[course_id for _, course_id in get_index().search(query)])
+
+
+def with_highlights(queryset, query):
+    if not uses_postgres():
+        return queryset
+    search_query = SearchQuery(query, config=search_config(), search_type="websearch")
+    return queryset.annotate(
+        title_highlight=SearchHeadline("title", search_query, config=search_config(), highlight_all=True,
+                                       **HIGHLIGHT_OPTIONS),
+        snippet_highlight=SearchHeadline(
+            Concat("description", Value("\n"), "search_document"), search_query, config=search_config(),
+            max_fragments=2, **HIGHLIGHT_OPTIONS,
+        ),
+    )
+
+
+def _mark(text, terms):
+    if not terms:
+        return escape(text)
+    # Matched on the raw text, so a term like "amp" can't land inside an entity.
+    pattern = re.compile(r"\b(%s)\b" % "|".join(map(re.escape, terms)), re.IGNORECASE)
+    parts, end = [], 0
+    for match in pattern.finditer(text):
+        parts += [escape(text[end:match.start()]), "<mark>", escape(match.group()), "</mark>"]
+        end = match.end()
+    parts.append(escape(text[end:]))
+    return "".join(parts)
+
+
+def _escape_headline(headline):
+    return escape(headline).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+
+def highlight(course, query):
+    """``{"title", "snippet"}``, HTML-escaped, with matches wrapped in ``<mark>``."""
+    if hasattr(course, "title_highlight"):
+        return {
+            "title": _escape_headline(course.title_highlight),
+            "snippet": _escape_headline(" ".join(strip_tags(course.snippet_highlight).split())),
+        }
+
+    terms = sorted(set(tokenize(query)), key=len, reverse=True)
+    text = " ".join(strip_tags(f"{course.description}\n{course.search_document}").split())
+    match = re.search(r"\b(%s)\b" % "|".join(map(re.escape, terms)), text, re.IGNORECASE) if terms else None
+    start = max(0, match.start() - SNIPPET_LENGTH // 4) if match else 0
+    snippet = text[start:start + SNIPPET_LENGTH]
+    return {
+        "title": _mark(course.title, terms),
+        "snippet": ("…" if start else "") + _mark(snippet, terms) + ("…" if start + SNIPPET_LENGTH < len(text) else ""),
+    }
@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Author, Student, Course, Module, Lesson, Review
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from .authentication import StudentRefreshToken
+from .images import srcset
+from .models import Author, Student, Course, Module, Lesson, Review, format_duration
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
@@ -64,6 +67,11 @@ class LoginSerializer(serializers.Serializer):
         return data
 
 
+class StudentTokenRefreshSerializer(TokenRefreshSerializer):
+    # Rejects revoked refresh tokens and revokes rotated ones via myapp.revocation.
+    token_class = StudentRefreshToken
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Student
@@ -72,7 +80,10 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 class CourseSerializer(serializers.ModelSerializer):
     course_image = serializers.SerializerMethodField()
+    course_image_srcset = serializers.SerializerMethodField()
     author_username = serializers.SerializerMethodField()
+    duration = serializers.SerializerMethodField()
+    duration_minutes = serializers.IntegerField(source='duration', read_only=True)
 
     class Meta:
         model = Course
@@ -80,18 +91,45 @@ class CourseSerializer(serializers.ModelSerializer):
             'id',
             'title',
             'course_image',
+            'course_image_srcset',
             'author_username',
             'description',
             'duration',
-            'level'
+            'duration_minutes',
+            'level',
+            'rating_count',
+            'rating_average',
+            'rating_histogram',
+            'total_lessons',
+            'total_module_minutes',
         ]
 
     def get_course_image(self, obj):
         return obj.course_image.url if obj.course_image else None
 
+    def get_course_image_srcset(self, obj):
+        return srcset(obj.course_image, obj.course_image_variants)
+
     def get_author_username(self, obj):
         return obj.author.user.username if obj.author and obj.author.user else None
 
+    def get_duration(self, obj):
+        return format_duration(obj.duration)
+
+
+class DashboardCourseSerializer(CourseSerializer):
+    completed_lessons = serializers.IntegerField(read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta(CourseSerializer.Meta):
+        fields = CourseSerializer.Meta.fields + ['completed_lessons', 'progress']
+
+    def get_progress(self, obj):
+        # Percent of the course's lessons completed; total_lessons is a maintained counter.
+        if not obj.total_lessons:
+            return 0.0
+        return min(100.0, round(100 * obj.completed_lessons / obj.total_lessons, 1))
+
 
 class LessonSerializer(serializers.ModelSerializer):
     module = serializers.CharField(source='module.module', read_only=True)
@@ -103,10 +141,15 @@ class LessonSerializer(serializers.ModelSerializer):
 
 class ModuleSerializer(serializers.ModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
+    duration = serializers.SerializerMethodField()
+    duration_minutes = serializers.IntegerField(source='duration', read_only=True)
 
     class Meta:
         model = Module
-        fields = ['id', 'module', 'lessons', 'duration']
+        fields = ['id', 'module', 'lessons', 'duration', 'duration_minutes']
+
+    def get_duration(self, obj):
+        return format_duration(obj.duration)
 
 class ReviewSerializer(serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -0,0 +1,212 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .autocomplete import course_title_changed
+from .cache import bump_course_version
+from .enrollment import invalidate_enrollments
+from .images import build_variants, needs_variants
+from .models import Author, Course, Lesson, LessonCompletion, Module, Review, Student
+from .search import defer_search_refresh, search_content_changed
+
+_batched_courses = ContextVar("batched_courses", default=None)
+
+
+@contextmanager
+def batch_course_updates():
+    """
+    Collects the courses touched by Module/Lesson/Review signals (admin inline
+    formsets, bulk imports) and recounts, stamps and invalidates each one once on
+    exit instead of issuing an UPDATE per row.
+    """
+    touched = _batched_courses.get()
+    if touched is not None:
+        yield touched
+        return
+
+    touched = set()
+    token = _batched_courses.set(touched)
+    try:
+        with defer_search_refresh():
+            yield touched
+    finally:
+        _batched_courses.reset(token)
+    if touched:
+        Course.recompute_totals(touched)
+        course_content_changed(*touched)
+
+
+def lesson_course_id(lesson):
+    if Lesson.module.is_cached(lesson):
+        return lesson.module.course_id
+    return module_course_id(lesson.module_id)
+
+
+def course_content_changed(*course_ids):
+    # New cache version for the shared payload, new Last-Modified/ETag stamp for clients.
+    course_ids = [course_id for course_id in course_ids if course_id is not None]
+    if not course_ids:
+        return
+    touched = _batched_courses.get()
+    if touched is not None:
+        touched.update(course_ids)
+        return
+    Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+    bump_course_version(*course_ids)
+
+
+def adjust_course_totals(course_id, lessons=0, minutes=0):
+    if course_id is None:
+        return
+    touched = _batched_courses.get()
+    if touched is not None:
+        touched.add(course_id)
+        return
+    updates = {"updated_at": timezone.now()}
+    if lessons:
+        updates["total_lessons"] = F("total_lessons") + lessons
+    if minutes:
+        updates["total_module_minutes"] = F("total_module_minutes") + minutes
+    Course.objects.filter(pk=course_id).update(**updates)
+    bump_course_version(course_id)
+
+
+def module_course_id(module_id):
+    return Module.objects.filter(pk=module_id).values_list('course_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    bump_course_version(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def course_image_changed(sender, instance, **kwargs):
+    if needs_variants(instance.course_image, instance.course_image_variants):
+        instance.course_image_variants = build_variants(instance.course_image) if instance.course_image else {}
+        Course.objects.filter(pk=instance.pk).update(course_image_variants=instance.course_image_variants)
+        course_content_changed(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def course_text_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or {'title', 'description'} & set(update_fields):
+        search_content_changed(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def course_title_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or 'title' in update_fields:
+        course_title_changed(instance.pk, instance.title)
+
+
+@receiver(post_delete, sender=Course)
+def course_title_deleted(sender, instance, **kwargs):
+    course_title_changed(instance.pk)
+
+
+@receiver(post_save, sender=Module)
+def module_saved(sender, instance, created, **kwargs):
+    minutes = instance.duration
+    previous_course_id, previous_duration = getattr(instance, "_counted", (None, None))
+
+    if created:
+        adjust_course_totals(instance.course_id, minutes=minutes)
+    elif previous_course_id is not None and previous_course_id != instance.course_id:
+        lessons = instance.lessons.count()
+        adjust_course_totals(previous_course_id, lessons=-lessons, minutes=-previous_duration)
+        adjust_course_totals(instance.course_id, lessons=lessons, minutes=minutes)
+        LessonCompletion.objects.filter(lesson__module=instance).update(course_id=instance.course_id)
+        search_content_changed(previous_course_id, instance.course_id)
+    elif previous_duration is not None:
+        adjust_course_totals(instance.course_id, minutes=minutes - previous_duration)
+    else:
+        course_content_changed(instance.course_id)
+    instance._counted = (instance.course_id, instance.duration)
+
+
+@receiver(post_delete, sender=Module)
+def module_deleted(sender, instance, **kwargs):
+    # Its lessons are cascaded first and uncount themselves.
+    course_id, duration = getattr(instance, "_counted", (instance.course_id, instance.duration))
+    adjust_course_totals(course_id, minutes=-(duration or 0))
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    previous_module_id = getattr(instance, "_counted_module_id", None)
+    course_id = lesson_course_id(instance)
+    if created:
+        adjust_course_totals(course_id, lessons=1)
+    elif previous_module_id is not None and previous_module_id != instance.module_id:
+        previous_course_id = module_course_id(previous_module_id)
+        if previous_course_id != course_id:
+            adjust_course_totals(previous_course_id, lessons=-1)
+            adjust_course_totals(course_id, lessons=1)
+            LessonCompletion.objects.filter(lesson=instance).update(course_id=course_id)
+            search_content_changed(previous_course_id)
+        else:
+            course_content_changed(course_id)
+    else:
+        course_content_changed(course_id)
+    search_content_changed(course_id)
+    instance._counted_module_id = instance.module_id
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    module_id = getattr(instance, "_counted_module_id", None) or instance.module_id
+    course_id = lesson_course_id(instance) if module_id == instance.module_id else module_course_id(module_id)
+    adjust_course_totals(course_id, lessons=-1)
+    search_content_changed(course_id)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, **kwargs):
+    course_content_changed(instance.course_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    # Sent inside the deletion transaction, including cascades from Student/Course.
+    course_id, rating = getattr(instance, "_counted_rating", (instance.course_id, instance.rating))
+    if None not in (course_id, rating):
+        Course.adjust_rating(course_id, rating, -1)
+
+
+@receiver(post_save, sender=Author)
+def author_changed(sender, instance, **kwargs):
+    course_content_changed(*instance.authored_courses.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Student)
+def avatar_changed(sender, instance, **kwargs):
+    if needs_variants(instance.avatar, instance.avatar_variants):
+        instance.avatar_variants = build_variants(instance.avatar) if instance.avatar else {}
+        Student.objects.filter(pk=instance.pk).update(avatar_variants=instance.avatar_variants)
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, update_fields=None, **kwargs):
+    # The catalog and the course Author block embed the author's username, about and avatar.
+    if update_fields is not None and not {'username', 'about', 'avatar'} & set(update_fields):
+        return
+    course_content_changed(*Course.objects.filter(author__user=instance).values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Student.enrolled_courses.through)
+def enrollments_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # course.students.clear(): remember who was enrolled before the rows go.
+        instance._cleared_student_ids = list(instance.students.values_list('id', flat=True))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            invalidate_enrollments(instance.pk)
+        elif action == "post_clear":
+            invalidate_enrollments(*getattr(instance, "_cleared_student_ids", ()))
+        else:
+            invalidate_enrollments(*(pk_set or ()))
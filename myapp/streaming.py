@@ -0,0 +1,167 @@
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import parse_http_date_safe
+
+from .conditional import make_etag, not_modified, set_validators
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Returns the inclusive ``(start, end)`` of a single byte range, or None when the
+    header is absent or is something we do not serve partially (e.g. multipart).
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes.
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class FileRange:
+    """
+    A read-limited view over an open file positioned at ``start``. It keeps
+    ``fileno()`` so gunicorn's ``wsgi.file_wrapper`` can still ``sendfile()``
+    exactly Content-Length bytes from the current offset.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+async def aread_chunks(file, length, chunk_size=FileResponse.block_size):
+    """
+    Reads ``length`` bytes off a worker thread. ASGI servers have no sendfile and
+    Django reads a sync file iterator into memory in full before sending it.
+    """
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while length > 0:
+            chunk = await read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/"')):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def serve_file(request, storage, name, content_type=None):
+    """
+    Serves a stored file with Range/206 support. Remote storages are redirected to,
+    and with ``MEDIA_ACCEL_REDIRECT_PREFIX`` set the transfer is handed to the
+    front proxy so app workers never stream bytes. Under ASGI the file is streamed
+    from an async iterator.
+    """
+    content_type = content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    accel_prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "")
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response.headers["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + quote(name)
+        return response
+
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        return HttpResponseRedirect(storage.url(name))
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return HttpResponse(status=404)
+
+    size = stat.st_size
+    etag = make_etag(name, size, stat.st_mtime_ns)
+    last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    byte_range = None
+    try:
+        if _if_range_matches(request, etag, stat.st_mtime):
+            byte_range = parse_range(request.headers.get("Range"), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response.headers["Content-Range"] = f"bytes */{size}"
+        response.headers["Accept-Ranges"] = "bytes"
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+    elif isinstance(getattr(request, "_request", request), ASGIRequest):
+        file = open(path, "rb")
+        file.seek(start)
+        response = StreamingHttpResponse(aread_chunks(file, length), content_type=content_type)
+    elif byte_range is None:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    else:
+        response = FileResponse(FileRange(open(path, "rb"), start, length), content_type=content_type)
+
+    if byte_range is not None:
+        response.status_code = 206
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response.headers["Content-Length"] = str(length)
+    response.headers["Accept-Ranges"] = "bytes"
+    return set_validators(response, etag, last_modified)
+
@@ -0,0 +1,204 @@
+import re
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from django.db import connections
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import force_authenticate
+
+from . import async_views, autocomplete, views
+from .authentication import STUDENT_ID_CLAIM, StudentJWTAuthentication, StudentRefreshToken, TokenStudent
+from .cache import NAMESPACES
+from .enrollment import invalidate_enrollments
+from .models import Author, Course, Lesson, LessonCompletion, Module, Review, Student
+
+# Queries each hot endpoint may issue, excluding authentication. These must not
+# depend on how many rows the catalog/course holds, so N+1 regressions fail CI.
+QUERY_BUDGETS = {
+    'course_autocomplete': 0,  # in-process prefix index
+    'course_list': 2,  # page of (id, updated_at) stamps; cold cache: those courses joined to author usernames
+    'course': 6,  # stamp with the review flag; cold caches: enrollment set, course+author, modules, lessons, first review page
+    'course_reviews': 1,
+    'dashboard': 1,  # enrolled courses page with a correlated completion count per course
+    'lesson': 2,  # updated_at stamp, then the lesson row
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class FullTableScan(AssertionError):
+    pass
+
+
+class UnindexedSort(FullTableScan):
+    pass
+
+
+@contextmanager
+def assert_num_queries(expected, using='default'):
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    executed = len(context.captured_queries)
+    if executed != expected:
+        statements = "\n".join(
+            f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, start=1)
+        )
+        raise QueryBudgetExceeded(f"{executed} queries executed, {expected} expected:\n{statements}")
+
+
+@contextmanager
+def assert_query_budget(view_name, using='default'):
+    with assert_num_queries(QUERY_BUDGETS[view_name], using=using) as context:
+        yield context
+
+
+def assert_constant_queries(view_name, request, add_rows, sizes=(1, 25), using='default'):
+    """
+    Calls ``add_rows(n)`` to grow the fixture to each size in ``sizes`` and then
+    ``request()``; every call must stay within the view's budget.
+    """
+    for size in sizes:
+        add_rows(size)
+        with assert_query_budget(view_name, using=using):
+            request()
+
+
+def assert_index_scan(queryset, index=None):
+    """
+    EXPLAINs ``queryset`` and fails if its model's table is read by a full scan
+    (PostgreSQL "Seq Scan", SQLite bare "SCAN"), or if ``index`` is not in the plan.
+    An explicit ``order_by`` must be served by the index scan, not by a sort step.
+    """
+    plan = queryset.explain()
+    table = re.escape(queryset.model._meta.db_table)
+    full_scan = re.search(rf"Seq Scan on {table}\b|\bSCAN {table}\b(?! USING)", plan)
+    if full_scan or (index and index not in plan):
+        expected = f"index {index}" if index else "an index"
+        raise FullTableScan(f"{queryset.model.__name__} query does not use {expected}:\n{plan}")
+    if queryset.query.order_by and re.search(r"TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY|\bSort Key:", plan):
+        raise UnindexedSort(f"{queryset.model.__name__} query sorts rows outside the index:\n{plan}")
+    return plan
+
+
+def seed_plan_data(course_count=200, reviews_per_course=20):
+    """A catalog big enough for the planner to prefer indexes; enrollments and completions included."""
+    students = Student.objects.bulk_create(
+        Student(username=f"plan-student-{i}", email=f"plan-student-{i}@example.com", password="!")
+        for i in range(reviews_per_course)
+    )
+    author = Author.objects.create(user=students[0])
+    levels = [choice for choice, _ in Course.LEVEL_CHOICES]
+    courses = Course.objects.bulk_create(
+        Course(title=f"Course {i}", description="", duration=7 * 24 * 60, level=levels[i % len(levels)],
+               author=author)
+        for i in range(course_count)
+    )
+    modules = Module.objects.bulk_create(
+        Module(module=f"Module {i}", course=course, duration=60)
+        for course in courses for i in range(3)
+    )
+    Lesson.objects.bulk_create(
+        Lesson(name=f"Lesson {i}", module=module, video_url="https://example.com/video.mp4")
+        for module in modules for i in range(5)
+    )
+    Review.objects.bulk_create(
+        Review(user=student, course=course, rating=1 + (course.id + i) % 5, created_at=timezone.now())
+        for course in courses for i, student in enumerate(students)
+    )
+    Student.enrolled_courses.through.objects.bulk_create(
+        Student.enrolled_courses.through(student=student, course=course)
+        for course in courses for student in students
+    )
+    first_lessons = list(Lesson.objects.filter(name="Lesson 0").values_list("id", "module__course_id"))
+    LessonCompletion.objects.bulk_create(
+        LessonCompletion(student=student, lesson_id=lesson_id, course_id=course_id)
+        for student in students for lesson_id, course_id in first_lessons
+    )
+
+
+def hot_queries():
+    """``(name, queryset, index or None)`` for each hot lookup, against ``seed_plan_data()`` rows."""
+    course = Course.objects.order_by("id").last()
+    lesson = Lesson.objects.filter(module__course=course).order_by("id").last()
+    student = Student.objects.order_by("id").last()
+    reviews = Review.objects.filter(course_id=course.id)
+    return [
+        ("catalog by level", Course.objects.filter(level="beginner")
+         .order_by("id").values("id", "updated_at")[:21], "course_level_id_idx"),
+        ("catalog by duration", Course.objects.filter(duration__lte=10 * 60).values("id"), None),
+        ("reviews newest", reviews.order_by(*views.REVIEW_ORDERINGS["newest"])[:11], "review_course_created_idx"),
+        *((f"reviews {sort}", reviews.order_by(*views.REVIEW_ORDERINGS[sort])[:11], "review_course_rating_idx")
+          for sort in ("highest", "lowest")),
+        *((f"reviews by rating {sort}", reviews.filter(rating=5).order_by(*views.REVIEW_ORDERINGS[sort])[:11],
+           "review_course_rating_idx") for sort in views.REVIEW_ORDERINGS),
+        ("lessons of a module", Lesson.objects.filter(module_id=lesson.module_id).order_by("id"),
+         "lesson_module_id_idx"),
+        ("lesson in course", Lesson.objects.filter(id=lesson.id, module__course_id=course.id), None),
+        ("pending videos", Lesson.objects.filter(video_status=Lesson.VIDEO_PENDING).order_by("id")[:10],
+         "lesson_pending_video_idx"),
+        ("stale video claims", Lesson.objects.filter(video_status=Lesson.VIDEO_PROCESSING, updated_at__lt=timezone.now()),
+         "lesson_processing_video_idx"),
+        ("completions of a course", LessonCompletion.objects.filter(student_id=student.id, course_id=course.id),
+         "completion_student_course_idx"),
+        ("login by username", Student.objects.filter(username=student.username), None),
+        ("login by email", Student.objects.filter(email=student.email), None),
+    ]
+
+
+def as_student(request, student):
+    """
+    Authenticates ``request`` as ``student`` for the DRF views (forced) and the async
+    views (bearer token, validated here once so budgets exclude authentication).
+    """
+    request.META["HTTP_AUTHORIZATION"] = f"Bearer {StudentRefreshToken.for_user(student).access_token}"
+    StudentJWTAuthentication().authenticate(request)
+    force_authenticate(request, TokenStudent({STUDENT_ID_CLAIM: student.id}))
+    return request
+
+
+def course_page_request(view, request, course_id, student_id):
+    """A course page call whose budget includes loading the student's enrollment set."""
+    view = async_to_sync(view) if view is async_views.course else view
+
+    def call():
+        invalidate_enrollments(student_id)
+        return view(request, id=course_id)
+    return call
+
+
+def budget_requests():
+    """
+    ``(budget name, label, call)`` for each budgeted view, against ``seed_plan_data()``
+    rows. Call ``cold_payload_cache()`` before each one; budgets are for a cold cache.
+    """
+    factory = RequestFactory()
+    course = Course.objects.order_by("id").last()
+    lesson = Lesson.objects.filter(module__course=course).order_by("id").last()
+    student = Student.objects.order_by("id").last()  # enrolled in every seeded course
+    dashboard = as_student(factory.get("/dashboard/"), student)
+    course_request = as_student(factory.get(f"/courses/{course.id}/"), student)
+    autocomplete.get_index()  # its budget is for a warm process
+    return [
+        ("course_autocomplete", "view", lambda: views.course_autocomplete(factory.get("/", {"q": "cour"}))),
+        ("course_list", "view", lambda: views.course_list(factory.get("/courses/", {"level": "beginner"}))),
+        ("course", "view", course_page_request(views.course, course_request, course.id, student.id)),
+        ("dashboard", "view", lambda: views.dashboard(dashboard)),
+        ("course_reviews", "view", lambda: views.course_reviews(factory.get("/"), id=course.id)),
+        ("lesson", "view", lambda: views.lesson(factory.get("/"), id=course.id, lessonid=lesson.id)),
+        # The ASGI profile's versions must stay within the same budgets.
+        ("course_list", "async view",
+         lambda: async_to_sync(async_views.course_list)(factory.get("/courses/", {"level": "beginner"}))),
+        ("course", "async view", course_page_request(async_views.course, course_request, course.id, student.id)),
+        ("lesson", "async view",
+         lambda: async_to_sync(async_views.lesson)(factory.get("/"), id=course.id, lessonid=lesson.id)),
+    ]
+
+
+def cold_payload_cache():
+    for namespace in NAMESPACES.values():
+        namespace.invalidate()
@@ -0,0 +1,1342 @@
+import base64
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import async_views, authentication, autocomplete, course_import, enrollment, export, images, revocation, throttling, video_processing, views
+from . import cache as cache_layer
+from .cache import Namespace, bump_version, get_course_detail, jittered
+from .models import Author, Course, Lesson, LessonCompletion, Module, Review, RevokedToken, Student
+from .search import HIGHLIGHT_START, HIGHLIGHT_STOP, highlight
+from .testing import (
+    as_student,
+    assert_constant_queries,
+    assert_index_scan,
+    assert_query_budget,
+    budget_requests,
+    cold_payload_cache,
+    course_page_request,
+    hot_queries,
+    seed_plan_data,
+)
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"}}
+
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+class InvalidCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(title="Course", description="d", duration=7 * 24 * 60)
+        student = Student.objects.create(username="reviewer", email="reviewer@example.com")
+        Review.objects.create(user=student, course=cls.course, rating=4)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_catalog_rejects_cursor_values_of_the_wrong_type(self):
+        for values in (["abc"], [{"a": 1}], [None], [True], [[1]], [1, 2], "abc"):
+            with self.subTest(values=values):
+                response = self.client.get("/courses/", {"cursor": raw_cursor(values)})
+                self.assertEqual(response.status_code, 400)
+
+    def test_reviews_reject_cursor_values_of_the_wrong_type(self):
+        url = f"/courses/{self.course.id}/reviews/"
+        for values in (["x", "y"], ["2024-01-01T00:00:00+00:00", "y"], [{"a": 1}, 1]):
+            with self.subTest(values=values):
+                response = self.client.get(url, {"cursor": raw_cursor(values)})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "Invalid cursor."})
+
+    def test_reviews_accept_their_own_next_cursor(self):
+        student = Student.objects.create(username="second", email="second@example.com")
+        Review.objects.create(user=student, course=self.course, rating=5)
+        url = f"/courses/{self.course.id}/reviews/"
+        first = self.client.get(url, {"page_size": 1}).json()
+        response = self.client.get(url, {"cursor": first["next_cursor"]})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NamespaceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.namespace = Namespace("test", 60)
+        self.builds = []
+
+    def build(self, value="value"):
+        def build():
+            self.builds.append(value)
+            return value
+        return build
+
+    def abuild(self, value="value"):
+        async def build():
+            self.builds.append(value)
+            return value
+        return build
+
+    def test_hit_does_not_rebuild(self):
+        self.assertEqual(self.namespace.get_or_build(("a",), self.build("one")), "one")
+        self.assertEqual(self.namespace.get_or_build(("a",), self.build("two")), "one")
+        self.assertEqual(self.builds, ["one"])
+
+    def test_invalidate_drops_every_entry(self):
+        self.namespace.get_or_build(("a",), self.build("a1"))
+        self.namespace.get_or_build(("b",), self.build("b1"))
+        self.namespace.invalidate()
+        self.assertEqual(self.namespace.get_or_build(("a",), self.build("a2")), "a2")
+        self.assertEqual(self.namespace.get_or_build(("b",), self.build("b2")), "b2")
+
+    def test_object_version_bump_rebuilds_only_that_entry(self):
+        self.namespace.get_or_build(("a",), self.build("a1"), "test:a:version")
+        self.namespace.get_or_build(("b",), self.build("b1"), "test:b:version")
+        bump_version("test:a:version")
+        self.assertEqual(self.namespace.get_or_build(("a",), self.build("a2"), "test:a:version"), "a2")
+        self.assertEqual(self.namespace.get_or_build(("b",), self.build("b2"), "test:b:version"), "b1")
+
+    def test_version_bump_during_build_discards_the_built_copy(self):
+        def build():
+            bump_version("test:a:version")  # an edit lands while the old content is being read
+            return "stale"
+
+        self.assertEqual(self.namespace.get_or_build(("a",), build, "test:a:version"), "stale")
+        self.assertEqual(self.namespace.get_or_build(("a",), self.build("fresh"), "test:a:version"), "fresh")
+
+    def test_waiter_gets_the_lock_holders_value(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_build():
+            started.set()
+            release.wait(5)
+            return "holder"
+
+        holder = threading.Thread(target=self.namespace.get_or_build, args=(("a",), slow_build))
+        holder.start()
+        started.wait(5)
+        threading.Timer(0.1, release.set).start()
+        self.assertEqual(self.namespace.get_or_build(("a",), self.build("waiter")), "holder")
+        holder.join()
+        self.assertEqual(self.builds, [])
+
+    def test_waiter_that_gives_up_leaves_the_holders_lock(self):
+        lock_key = self.namespace.key("a") + ":rebuild"
+        cache.add(lock_key, 1, 60)  # held by a slow rebuild elsewhere
+        with mock.patch.object(cache_layer, "REBUILD_WAIT", 0.05):
+            self.assertEqual(self.namespace.get_or_build(("a",), self.build("waiter")), "waiter")
+        self.assertTrue(cache.get(lock_key))
+
+    def test_due_entry_is_served_stale_while_another_caller_refreshes(self):
+        self.namespace.get_or_build(("a",), self.build("old"))
+        cache.add(self.namespace.key("a") + ":rebuild", 1, 60)
+        with mock.patch.object(cache_layer, "_due_for_refresh", return_value=True):
+            self.assertEqual(self.namespace.get_or_build(("a",), self.build("new")), "old")
+        self.assertEqual(self.builds, ["old"])
+
+    def test_due_entry_is_refreshed_early(self):
+        self.namespace.get_or_build(("a",), self.build("old"))
+        with mock.patch.object(cache_layer, "_due_for_refresh", return_value=True):
+            self.assertEqual(self.namespace.get_or_build(("a",), self.build("new")), "new")
+
+    def test_early_refresh_probability(self):
+        self.assertFalse(cache_layer._due_for_refresh(expires_at=float("inf"), cost=1.0))
+        self.assertTrue(cache_layer._due_for_refresh(expires_at=0, cost=0.0))
+
+    def test_jittered_timeouts_stay_within_bounds(self):
+        timeouts = {jittered(1000) for _ in range(200)}
+        self.assertTrue(all(900 <= timeout <= 1100 for timeout in timeouts))
+        self.assertGreater(len(timeouts), 1)
+
+    def test_entries_expire_within_ten_percent_of_the_timeout(self):
+        namespace = Namespace("test", 1000)
+        expiries = set()
+        for i in range(50):
+            namespace.get_or_build((i,), self.build())
+            expiries.add(round(cache.get(namespace.key(i))[2] - time.time()))
+        self.assertTrue(all(899 <= expiry <= 1100 for expiry in expiries), expiries)
+        self.assertGreater(len(expiries), 1)
+
+    def test_refresh_comes_earlier_for_costly_entries(self):
+        with mock.patch.object(cache_layer.random, "random", return_value=1 - math.exp(-1)):  # -log(1 - r) == 1
+            now = time.time()
+            self.assertFalse(cache_layer._due_for_refresh(expires_at=now + 5, cost=1.0))
+            self.assertTrue(cache_layer._due_for_refresh(expires_at=now + 5, cost=10.0))
+            self.assertTrue(cache_layer._due_for_refresh(expires_at=now + 0.5, cost=1.0))
+
+    def test_async_invalidation(self):
+        get = async_to_sync(self.namespace.aget_or_build)
+        self.assertEqual(get(("a",), self.abuild("a1"), "test:a:version"), "a1")
+        bump_version("test:a:version")
+        self.assertEqual(get(("a",), self.abuild("a2"), "test:a:version"), "a2")
+        self.namespace.invalidate()
+        self.assertEqual(get(("a",), self.abuild("a3"), "test:a:version"), "a3")
+        self.assertEqual(get(("a",), self.abuild("a4"), "test:a:version"), "a3")
+
+    def test_async_build_is_cached(self):
+        get = async_to_sync(self.namespace.aget_or_build)
+        self.assertEqual(get(("a",), self.abuild("one")), "one")
+        self.assertEqual(get(("a",), self.abuild("two")), "one")
+        self.assertEqual(self.builds, ["one"])
+
+
+class QueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.factory = RequestFactory()
+
+    def add_authored_courses(self, count):
+        start = Student.objects.count()
+        for i in range(start, start + count):
+            student = Student.objects.create(username=f"author{i}", email=f"author{i}@example.com", role="author")
+            Course.objects.create(
+                title=f"Course {i}", description="d", duration=7 * 24 * 60, author=Author.objects.create(user=student)
+            )
+
+    def test_catalog_query_count_does_not_grow_with_authors(self):
+        renders = {
+            "view": lambda: self.client.get("/courses/"),
+            "async view": lambda: async_to_sync(async_views.course_list)(self.factory.get("/courses/")),
+        }
+        for kind, get in renders.items():
+            with self.subTest(kind):
+                Course.objects.all().delete()
+                pages = []
+
+                def render():
+                    response = get()
+                    self.assertEqual(response.status_code, 200)
+                    pages.append({course["author_username"] for course in json.loads(response.content)["results"]})
+
+                # 1 author, then 1 + 15; each page is rendered cold since its stamps are new.
+                assert_constant_queries("course_list", render, self.add_authored_courses, sizes=(1, 15))
+                self.assertEqual([len(authors) for authors in pages], [1, 16])
+
+    def test_course_query_count_does_not_grow_with_modules_and_reviews(self):
+        student = Student.objects.create(username="student", email="student@example.com")
+        author = Student.objects.create(username="author", email="author@example.com", role="author")
+        course = Course.objects.create(
+            title="Course", description="d", duration=7 * 24 * 60, author=Author.objects.create(user=author)
+        )
+        student.enrolled_courses.add(course)
+        request = as_student(self.factory.get(f"/courses/{course.id}/"), student)
+
+        def add_content(count):
+            start = Student.objects.count()
+            for i in range(start, start + count):
+                module = Module.objects.create(module=f"Module {i}", course=course, duration=60)
+                for j in range(2):
+                    Lesson.objects.create(name=f"Lesson {i}.{j}", module=module, video_url="https://example.com/v.mp4")
+                reviewer = Student.objects.create(username=f"reviewer{i}", email=f"reviewer{i}@example.com")
+                Review.objects.create(user=reviewer, course=course, rating=1 + i % 5)
+
+        for view in (views.course, async_views.course):
+            with self.subTest(view.__module__):
+                Module.objects.all().delete()
+                Review.objects.all().delete()
+                pages = []
+                call = course_page_request(view, request, course.id, student.id)
+
+                def render():
+                    response = call()
+                    self.assertEqual(response.status_code, 200)
+                    page = response.data if view is views.course else json.loads(response.content)
+                    pages.append((len(page["Curriculum"]), len(page["Reviews"]["existing_reviews"])))
+
+                # Each render is cold: the edits bump the course version.
+                assert_constant_queries("course", render, add_content, sizes=(1, 15))
+                self.assertEqual(pages, [(1, 1), (16, 10)])
+
+
+class CatalogRevalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.courses = [
+            Course.objects.create(title=f"Course {i}", description="d", duration=7 * 24 * 60) for i in range(3)
+        ]
+
+    def get_sync(self, **headers):
+        return APIClient().get("/courses/", headers=headers)
+
+    def get_async(self, **headers):
+        return async_to_sync(async_views.course_list)(RequestFactory().get("/courses/", headers=headers))
+
+    def test_deleting_a_course_is_not_answered_with_304(self):
+        for get in (self.get_sync, self.get_async):
+            with self.subTest(get.__name__):
+                first = get()
+                self.assertEqual(first.status_code, 200)
+                self.assertNotIn("Last-Modified", first)
+                self.assertEqual(get(**{"If-None-Match": first["ETag"]}).status_code, 304)
+
+                self.courses.pop().delete()
+                response = get(**{"If-None-Match": first["ETag"], "If-Modified-Since": http_date()})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [course["id"] for course in json.loads(response.content)["results"]],
+                    [course.id for course in self.courses],
+                )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CourseDetailInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Student.objects.create(username="author", email="author@example.com", role="author")
+        self.course = Course.objects.create(
+            title="Course", description="d", duration=7 * 24 * 60, author=Author.objects.create(user=self.author)
+        )
+        self.module = Module.objects.create(module="Module", course=self.course, duration=60)
+        self.lesson = Lesson.objects.create(name="Lesson", module=self.module, video_url="https://example.com/v.mp4")
+
+    def detail(self):
+        return get_course_detail(self.course.id, lambda: views.build_course_detail(self.course.id))
+
+    def edit(self, change):
+        self.detail()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        return self.detail()
+
+    def test_module_edit(self):
+        self.module.module = "Renamed"
+        detail = self.edit(self.module.save)
+        self.assertEqual(detail["Curriculum"][0]["module"], "Renamed")
+
+    def test_lesson_edit(self):
+        self.lesson.name = "Renamed"
+        detail = self.edit(self.lesson.save)
+        self.assertEqual(detail["Curriculum"][0]["lessons"][0]["name"], "Renamed")
+
+    def test_new_review(self):
+        reviewer = Student.objects.create(username="reviewer", email="reviewer@example.com")
+        detail = self.edit(lambda: Review.objects.create(user=reviewer, course=self.course, rating=4))
+        self.assertEqual(detail["Overview"]["rating_count"], 1)
+        self.assertEqual([review["user_username"] for review in detail["reviews"]["results"]], ["reviewer"])
+
+    def test_author_edit(self):
+        self.author.about = "Teaches things"
+        detail = self.edit(self.author.save)
+        self.assertEqual(detail["Author"]["about"], "Teaches things")
+
+    def test_copy_built_before_the_commit_is_not_kept(self):
+        stale = self.detail()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.module.module = "Renamed"
+            self.module.save()
+            # A reader that still sees the old rows caches them under the bumped version.
+            get_course_detail(self.course.id, lambda: stale)
+        self.assertEqual(self.detail()["Curriculum"][0]["module"], "Renamed")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create_course(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Course.objects.create(title=title, description="d", duration=7 * 24 * 60)
+
+    def titles(self, prefix):
+        return [suggestion["title"] for suggestion in autocomplete.suggest(prefix)]
+
+    def test_new_titles_are_suggested(self):
+        self.create_course("Django basics")
+        self.assertEqual(self.titles("dja"), ["Django basics"])
+        self.create_course("Advanced Django")
+        self.assertEqual(self.titles("dja"), ["Django basics", "Advanced Django"])
+
+    def test_change_made_without_the_lock_survives_the_holders_write(self):
+        self.create_course("Django basics")
+        autocomplete.get_index()
+        stale_titles = cache.get(autocomplete.AUTOCOMPLETE_TITLES_KEY)[1].copy()
+
+        # Another writer holds the lock, has read the map and bumped the version...
+        cache.add(autocomplete.AUTOCOMPLETE_LOCK_KEY, 1, 60)
+        holder_version = bump_version(autocomplete.AUTOCOMPLETE_VERSION_KEY)
+        self.create_course("Django testing")
+        # ...and its map, which lacks our change, lands afterwards.
+        cache.set(autocomplete.AUTOCOMPLETE_TITLES_KEY, (holder_version, stale_titles))
+        cache.delete(autocomplete.AUTOCOMPLETE_LOCK_KEY)
+
+        with mock.patch.object(autocomplete, "_local", (None, None)):  # as seen by another process
+            self.assertEqual(self.titles("django t"), ["Django testing"])
+
+
+class HighlightTests(SimpleTestCase):
+    def test_fallback_escapes_text_and_marks_matches(self):
+        course = Course(title="<b>Django</b> & co", description="Learn <em>Django</em> fast", search_document="")
+        self.assertEqual(highlight(course, "django"), {
+            "title": "&lt;b&gt;<mark>Django</mark>&lt;/b&gt; &amp; co",
+            "snippet": "Learn <mark>Django</mark> fast",
+        })
+
+    def test_postgres_headlines_are_escaped_like_the_fallback(self):
+        course = Course(title="<b>Django</b> & co")
+        course.title_highlight = f"<b>{HIGHLIGHT_START}Django{HIGHLIGHT_STOP}</b> & co"
+        course.snippet_highlight = f"Learn <em>{HIGHLIGHT_START}Django{HIGHLIGHT_STOP}</em> fast"
+        self.assertEqual(highlight(course, "django"), {
+            "title": "&lt;b&gt;<mark>Django</mark>&lt;/b&gt; &amp; co",
+            "snippet": "Learn <mark>Django</mark> fast",
+        })
+
+    def test_terms_that_spell_entities_are_marked_outside_them(self):
+        course = Course(title="Tom & Jerry amp <lt>", description="quot \"quoted\" gt", search_document="")
+        self.assertEqual(highlight(course, "amp lt quot gt"), {
+            "title": "Tom &amp; Jerry <mark>amp</mark> &lt;<mark>lt</mark>&gt;",
+            "snippet": "<mark>quot</mark> &quot;quoted&quot; <mark>gt</mark>",
+        })
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FallbackSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title = self.create("Django testing", "A course.")
+            self.in_description = self.create("Web apps", "Build apps with Django.")
+            self.in_lesson = self.create("Python", "Everything about Python.")
+            module = Module.objects.create(module="Module", course=self.in_lesson, duration=60)
+            Lesson.objects.create(name="Django <script>views</script>", module=module, video_url="https://example.com/v.mp4")
+            self.create("Flask", "Another framework.")
+
+    def create(self, title, description):
+        return Course.objects.create(title=title, description=description, duration=7 * 24 * 60)
+
+    def search(self, **params):
+        response = APIClient().get("/courses/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_title_matches_rank_above_description_and_lesson_matches(self):
+        results = self.search(q="django")["results"]
+        self.assertEqual([course["id"] for course in results], [self.in_title.id, self.in_description.id, self.in_lesson.id])
+        self.assertEqual([course["rank"] for course in results], sorted((course["rank"] for course in results), reverse=True))
+
+    def test_every_term_must_match(self):
+        self.assertEqual([course["id"] for course in self.search(q="django apps")["results"]], [self.in_description.id])
+        self.assertEqual(self.search(q="django flask")["results"], [])
+
+    def test_pages_follow_the_ranking(self):
+        seen, cursor = [], None
+        while True:
+            page = self.search(q="django", page_size=1, **({"cursor": cursor} if cursor else {}))
+            seen += [course["id"] for course in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, [self.in_title.id, self.in_description.id, self.in_lesson.id])
+
+    def test_bad_cursor(self):
+        response = APIClient().get("/courses/search/", {"q": "django", "cursor": raw_cursor(["x", 1])})
+        self.assertEqual(response.status_code, 400)
+
+    def test_lesson_markup_is_stripped_from_the_snippet(self):
+        results = {course["id"]: course for course in self.search(q="django")["results"]}
+        self.assertEqual(
+            results[self.in_lesson.id]["highlight"]["snippet"], "Everything about Python. <mark>Django</mark> views"
+        )
+
+    def test_index_follows_edits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title.title = "Testing"
+            self.in_title.save()
+        self.assertNotIn(self.in_title.id, [course["id"] for course in self.search(q="django")["results"]])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReviewSortTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(title="Course", description="d", duration=7 * 24 * 60)
+        start = timezone.now()
+        for i, rating in enumerate([5, 3, 5, 3, 1, 5]):
+            student = Student.objects.create(username=f"reviewer{i}", email=f"reviewer{i}@example.com")
+            review = Review.objects.create(user=student, course=cls.course, rating=rating)
+            Review.objects.filter(pk=review.pk).update(created_at=start + timedelta(minutes=i % 3))
+        cls.reviews = list(Review.objects.values("id", "rating", "created_at"))
+
+    def pages(self, **params):
+        url, ids, cursor = f"/courses/{self.course.id}/reviews/", [], None
+        while True:
+            page = self.client.get(url, {**params, "page_size": 2, **({"cursor": cursor} if cursor else {})}).json()
+            ids += [review["id"] for review in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def expected(self, key, reviews=None):
+        return [review["id"] for review in sorted(reviews or self.reviews, key=key)]
+
+    def test_sorts_page_through_every_review_once(self):
+        newest = lambda review: (-review["created_at"].timestamp(), -review["id"])
+        orders = {
+            "newest": newest,
+            "oldest": lambda review: (review["created_at"], review["id"]),
+            "highest": lambda review: (-review["rating"], *newest(review)),
+            "lowest": lambda review: (review["rating"], review["created_at"], review["id"]),
+        }
+        for sort, key in orders.items():
+            with self.subTest(sort):
+                cache.clear()
+                self.assertEqual(self.pages(sort=sort), self.expected(key))
+                fives = [review for review in self.reviews if review["rating"] == 5]
+                self.assertEqual(self.pages(sort=sort, rating=5), self.expected(key, fives))
+
+
+class QueryPlanTests(TestCase):
+    """The same checks as ``manage.py check_query_plans``, on a smaller seeded catalog."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_plan_data(course_count=60, reviews_per_course=5)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+        if connection.vendor == "postgresql":
+            # Small tables would otherwise be scanned whatever the indexes.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset, index in hot_queries():
+            with self.subTest(name):
+                assert_index_scan(queryset, index)
+
+    def test_views_stay_within_query_budgets(self):
+        for name, kind, request in budget_requests():
+            with self.subTest(f"{name} {kind}"):
+                cold_payload_cache()
+                with assert_query_budget(name):
+                    request()
+
+
+duration_migration = import_module("myapp.migrations.0014_duration_minutes")
+
+
+class DurationParsingTests(SimpleTestCase):
+    def test_old_spellings_in_any_case(self):
+        cases = {
+            ("1 week", "COURSE"): 7 * 24 * 60,
+            ("1 Week", "COURSE"): 7 * 24 * 60,
+            ("30 DAYS", "COURSE"): 30 * 24 * 60,
+            (" 3  weeks ", "COURSE"): 3 * 7 * 24 * 60,
+            ("2 Hours", "MODULE"): 120,
+            ("15 minute", "MODULE"): 15,
+        }
+        for (value, kind), minutes in cases.items():
+            with self.subTest(value):
+                pattern = getattr(duration_migration, f"{kind}_DURATION_RE")
+                self.assertEqual(duration_migration.to_minutes(value, pattern), minutes)
+
+    def test_values_the_old_validators_rejected_do_not_parse(self):
+        cases = [
+            ("0 days", "COURSE"), ("31 days", "COURSE"), ("2 hours", "COURSE"), ("1 fortnight", "COURSE"),
+            ("3 weeks", "MODULE"), ("45 minutes", "MODULE"), ("", "MODULE"), (None, "MODULE"),
+        ]
+        for value, kind in cases:
+            with self.subTest(value):
+                pattern = getattr(duration_migration, f"{kind}_DURATION_RE")
+                self.assertIsNone(duration_migration.to_minutes(value, pattern))
+
+
+class DurationMigrationTests(TransactionTestCase):
+    before, after = ("myapp", "0013_course_totals"), ("myapp", "0014_duration_minutes")
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes("myapp"))
+
+    def seed(self, course_duration, module_duration):
+        apps = self.migrate(self.before)
+        course = apps.get_model("myapp", "Course").objects.create(title="C", description="d", duration=course_duration)
+        apps.get_model("myapp", "Module").objects.create(module="M", course=course, duration=module_duration)
+        return course.pk
+
+    def test_durations_become_minutes(self):
+        course_id = self.seed("1 Week", "2 Hours")
+        apps = self.migrate(self.after)
+        self.assertEqual(apps.get_model("myapp", "Course").objects.get(pk=course_id).duration, 7 * 24 * 60)
+        self.assertEqual(apps.get_model("myapp", "Module").objects.get(course_id=course_id).duration, 120)
+
+    def test_unreadable_durations_stop_the_migration(self):
+        course_id = self.seed("1 fortnight", "2 hours")
+        with self.assertRaisesMessage(ValueError, f"Course {course_id}: '1 fortnight'"):
+            self.migrate(self.after)
+
+        # Nothing was written; once the row is fixed the migration goes through.
+        apps = self.migrate(self.before)
+        apps.get_model("myapp", "Course").objects.filter(pk=course_id).update(duration="2 weeks")
+        apps = self.migrate(self.after)
+        self.assertEqual(apps.get_model("myapp", "Course").objects.get(pk=course_id).duration, 2 * 7 * 24 * 60)
+
+
+def throttle_rate(throttle, rate):
+    return mock.patch.dict(throttle.THROTTLE_RATES, {throttle.scope: rate})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, username, ip):
+        return self.client.post("/login/", {"username": username, "password": "wrong"}, REMOTE_ADDR=ip).status_code
+
+    def test_ip_throttle(self):
+        with throttle_rate(throttling.LoginIPThrottle, "2/min"):
+            self.assertEqual([self.login(f"user{i}", "10.0.0.1") for i in range(3)], [400, 400, 429])
+            self.assertEqual(self.login("user3", "10.0.0.2"), 400)
+
+    def test_account_throttle_spans_ips_and_letter_case(self):
+        with throttle_rate(throttling.LoginAccountThrottle, "2/min"):
+            attempts = [self.login(username, f"10.0.0.{i}") for i, username in enumerate(["alice", "Alice", " ALICE"])]
+            self.assertEqual(attempts, [400, 400, 429])
+            self.assertEqual(self.login("bob", "10.0.0.9"), 400)
+
+    def test_signup_ip_throttle(self):
+        with throttle_rate(throttling.SignupIPThrottle, "1/hour"):
+            statuses = [self.client.post("/signup/", {}, REMOTE_ADDR="10.0.0.1").status_code for _ in range(2)]
+            self.assertEqual(statuses, [400, 429])
+
+
+@override_settings(
+    PASSWORD_HASHERS=["myapp.hashers.TunablePBKDF2PasswordHasher", "myapp.hashers.TunableScryptPasswordHasher"],
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+    PASSWORD_SCRYPT_WORK_FACTOR=2**10,
+)
+class PasswordRehashTests(TestCase):
+    def create_student(self, encoded):
+        return Student.objects.create(username="student", email="student@example.com", password=encoded)
+
+    def login(self, password="s3cret-pass"):
+        return APIClient().post("/login/", {"username": "student", "password": password}).status_code
+
+    def stored_hash(self):
+        return Student.objects.get(username="student").password
+
+    def test_old_cost_is_rehashed_on_login(self):
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=500):
+            self.create_student(make_password("s3cret-pass"))
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$500$"))
+        self.assertEqual(self.login(), 200)
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$1000$"))
+
+    def test_other_hasher_is_rehashed_on_login(self):
+        self.create_student(make_password("s3cret-pass", hasher="scrypt"))
+        self.assertEqual(self.login(), 200)
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$1000$"))
+        self.assertEqual(self.login(), 200)
+
+    def test_failed_login_keeps_the_hash(self):
+        self.create_student(make_password("s3cret-pass", hasher="scrypt"))
+        encoded = self.stored_hash()
+        self.assertEqual(self.login("wrong"), 400)
+        self.assertEqual(self.stored_hash(), encoded)
+
+    def test_current_hash_is_left_alone(self):
+        self.create_student(make_password("s3cret-pass"))
+        encoded = self.stored_hash()
+        self.assertEqual(self.login(), 200)
+        self.assertEqual(self.stored_hash(), encoded)
+
+
+class VideoPipelineTests(TestCase):
+    def setUp(self):
+        self.media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media, VIDEO_ENCODER="myapp.video_processing.PassthroughEncoder"))
+        course = Course.objects.create(title="Course", description="d", duration=7 * 24 * 60)
+        module = Module.objects.create(module="Module", course=course, duration=60)
+        self.lesson = Lesson.objects.create(
+            name="Lesson", module=module, uploaded_video=SimpleUploadedFile("clip.mp4", b"original video")
+        )
+
+    def refresh(self):
+        self.lesson.refresh_from_db()
+        return self.lesson
+
+    def hls_files(self):
+        root = video_processing.hls_storage().location
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), root)
+            for directory, _, names in os.walk(root) for name in names
+        )
+
+    def test_claim_encode_publish(self):
+        self.assertEqual(self.lesson.video_status, Lesson.VIDEO_PENDING)
+        self.assertEqual(video_processing.claim_next_lesson(), self.lesson.id)
+        self.assertEqual(self.refresh().video_status, Lesson.VIDEO_PROCESSING)
+        self.assertIsNone(video_processing.claim_next_lesson())
+
+        self.assertTrue(video_processing.process_lesson_video(self.lesson.id))
+        lesson = self.refresh()
+        self.assertEqual(lesson.video_status, Lesson.VIDEO_READY)
+        storage = video_processing.hls_storage()
+        with storage.open(lesson.hls_manifest) as master:
+            self.assertIn(b"360p/index.m3u8", master.read())
+        prefix = os.path.dirname(lesson.hls_manifest)
+        with storage.open(f"{prefix}/720p/segment_00000.ts") as segment:
+            self.assertEqual(segment.read(), b"original video")
+        self.assertEqual(video_processing.hls_manifest_url(lesson), f"/media/hls/{lesson.hls_manifest}")
+
+    def test_new_renditions_replace_the_old_ones(self):
+        call_command("process_videos", "--once", stdout=open(os.devnull, "w"))
+        old_manifest = self.refresh().hls_manifest
+        self.lesson.uploaded_video = SimpleUploadedFile("clip.mp4", b"second video")
+        self.lesson.save()
+        call_command("process_videos", "--once", stdout=open(os.devnull, "w"))
+
+        lesson = self.refresh()
+        self.assertEqual(lesson.video_status, Lesson.VIDEO_READY)
+        self.assertNotEqual(lesson.hls_manifest, old_manifest)
+        self.assertEqual({path.split(os.sep)[1] for path in self.hls_files()}, {lesson.hls_manifest.split("/")[1]})
+
+    def test_upload_replaced_while_encoding_is_not_published(self):
+        lesson_id = video_processing.claim_next_lesson()
+
+        class ReplacingEncoder(video_processing.PassthroughEncoder):
+            def encode(self, source_path, output_dir, renditions):
+                lesson = Lesson.objects.get(pk=lesson_id)
+                lesson.uploaded_video = SimpleUploadedFile("clip.mp4", b"replacement video")
+                lesson.save()
+                super().encode(source_path, output_dir, renditions)
+
+        self.assertFalse(video_processing.process_lesson_video(lesson_id, encoder=ReplacingEncoder()))
+        lesson = self.refresh()
+        self.assertEqual((lesson.video_status, lesson.hls_manifest), (Lesson.VIDEO_PENDING, ""))
+        self.assertEqual(self.hls_files(), [])
+        self.assertEqual(video_processing.claim_next_lesson(), lesson_id)  # the replacement is queued
+
+    def test_failed_encode(self):
+        class FailingEncoder(video_processing.Encoder):
+            def encode(self, source_path, output_dir, renditions):
+                os.makedirs(output_dir)
+                raise video_processing.EncodingError("bad input")
+
+        lesson_id = video_processing.claim_next_lesson()
+        with self.assertLogs("myapp.video_processing", "ERROR"):
+            self.assertFalse(video_processing.process_lesson_video(lesson_id, encoder=FailingEncoder()))
+        lesson = self.refresh()
+        self.assertEqual((lesson.video_status, lesson.video_error), (Lesson.VIDEO_FAILED, "bad input"))
+        self.assertEqual(self.hls_files(), [])
+
+    @override_settings(VIDEO_CLAIM_TIMEOUT=600)
+    def test_claim_of_a_dead_worker_is_taken_again(self):
+        lesson_id = video_processing.claim_next_lesson()
+        Lesson.objects.filter(pk=lesson_id).update(updated_at=timezone.now() - timedelta(seconds=599))
+        self.assertIsNone(video_processing.claim_next_lesson())
+
+        Lesson.objects.filter(pk=lesson_id).update(updated_at=timezone.now() - timedelta(seconds=601))
+        self.assertEqual(video_processing.claim_next_lesson(), lesson_id)
+        self.assertEqual(self.refresh().video_status, Lesson.VIDEO_PROCESSING)
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.courses = [Course.objects.create(title=f"Course {i}", description="d", duration=7 * 24 * 60) for i in range(2)]
+        self.students = [Student.objects.create(username=f"s{i}", email=f"s{i}@example.com") for i in range(3)]
+
+    def stats(self, course):
+        course = Course.objects.get(pk=course.pk)
+        return course.rating_count, course.rating_sum, course.rating_histogram
+
+    def histogram(self, **counts):
+        return {str(star): counts.get(f"r{star}", 0) for star in range(1, 6)}
+
+    def test_create_change_move_delete(self):
+        first, second = self.courses
+        review = Review.objects.create(user=self.students[0], course=first, rating=4)
+        Review.objects.create(user=self.students[1], course=first, rating="5")
+        self.assertEqual(self.stats(first), (2, 9, self.histogram(r4=1, r5=1)))
+
+        review.rating = 2
+        review.save()
+        self.assertEqual(self.stats(first), (2, 7, self.histogram(r2=1, r5=1)))
+
+        review.course = second
+        review.save()
+        self.assertEqual(self.stats(first), (1, 5, self.histogram(r5=1)))
+        self.assertEqual(self.stats(second), (1, 2, self.histogram(r2=1)))
+
+        # Saved again from a fresh copy, it must not count twice.
+        review = Review.objects.get(pk=review.pk)
+        review.feedback = "Edited"
+        review.save()
+        self.assertEqual(self.stats(second), (1, 2, self.histogram(r2=1)))
+
+        review.delete()
+        self.assertEqual(self.stats(second), (0, 0, self.histogram()))
+        self.assertIsNone(Course.objects.get(pk=second.pk).rating_average)
+
+    def test_instance_saved_without_loading_the_previous_rating(self):
+        review = Review.objects.create(user=self.students[0], course=self.courses[0], rating=3)
+        Review(pk=review.pk, user=self.students[0], course=self.courses[0], rating=1, created_at=review.created_at).save()
+        self.assertEqual(self.stats(self.courses[0]), (1, 1, self.histogram(r1=1)))
+
+    def test_cascades_uncount_their_reviews(self):
+        for student, rating in zip(self.students, (1, 4, 5)):
+            Review.objects.create(user=student, course=self.courses[0], rating=rating)
+        self.students[1].delete()
+        self.assertEqual(self.stats(self.courses[0]), (2, 6, self.histogram(r1=1, r5=1)))
+        Review.objects.filter(course=self.courses[0]).delete()
+        self.assertEqual(self.stats(self.courses[0]), (0, 0, self.histogram()))
+
+    def test_recompute_repairs_drift(self):
+        for student, rating in zip(self.students, (2, 3, 3)):
+            Review.objects.create(user=student, course=self.courses[0], rating=rating)
+        Course.objects.filter(pk=self.courses[0].pk).update(rating_count=7, rating_sum=1, rating_3=0)
+        Course.objects.filter(pk=self.courses[1].pk).update(rating_count=1, rating_sum=5, rating_5=1)
+
+        out = StringIO()
+        call_command("recompute_ratings", "--batch-size", "1", stdout=out)
+        self.assertIn("2 course(s)", out.getvalue())
+        self.assertEqual(self.stats(self.courses[0]), (3, 8, self.histogram(r2=1, r3=2)))
+        self.assertEqual(self.stats(self.courses[1]), (0, 0, self.histogram()))
+
+        self.assertEqual(Course.recompute_ratings(), [])
+
+
+class MediaStorageTests(TestCase):
+    def setUp(self):
+        self.media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        course = Course.objects.create(title="Course", description="d", duration=7 * 24 * 60)
+        self.module = Module.objects.create(module="Module", course=course, duration=60)
+
+    def files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.media).replace(os.sep, "/")
+            for directory, _, names in os.walk(self.media) for name in names
+        )
+
+    def write(self, name, content=b"x", age_hours=48):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        self.age(name, age_hours)
+        return name
+
+    def age(self, name, hours):
+        then = time.time() - hours * 3600
+        os.utime(os.path.join(self.media, name), (then, then))
+
+    def lesson(self, content=b"video", name="clip.MP4"):
+        return Lesson.objects.create(name="Lesson", module=self.module, uploaded_video=SimpleUploadedFile(name, content))
+
+    def test_identical_uploads_share_one_blob(self):
+        first, second = self.lesson(), self.lesson(name="other.mp4")
+        third = self.lesson(b"other video")
+        self.assertEqual(first.uploaded_video.name, second.uploaded_video.name)
+        self.assertRegex(first.uploaded_video.name, r"^lesson_videos/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.mp4$")
+        self.assertNotEqual(first.uploaded_video.name, third.uploaded_video.name)
+        self.assertEqual(self.files(), sorted([first.uploaded_video.name, third.uploaded_video.name]))
+        with default_storage.open(first.uploaded_video.name) as blob:
+            self.assertEqual(blob.read(), b"video")
+
+    def test_reused_blob_counts_as_new(self):
+        name = self.lesson().uploaded_video.name
+        self.age(name, 48)
+        self.lesson()
+        self.assertGreater(os.path.getmtime(os.path.join(self.media, name)), time.time() - 60)
+
+    def gc(self, *args):
+        call_command("gc_media", "--min-age", "24", *args, stdout=StringIO())
+        return self.files()
+
+    def test_gc_keeps_referenced_young_and_legacy_files(self):
+        referenced = self.lesson().uploaded_video.name
+        self.age(referenced, 48)
+        orphan = default_storage.save("lesson_videos/orphan.mp4", ContentFile(b"orphan"))
+        self.age(orphan, 48)
+        young_orphan = default_storage.save("lesson_videos/young.mp4", ContentFile(b"young"))
+        in_html = default_storage.save("uploads/picture.png", ContentFile(b"picture"))
+        self.age(in_html, 48)
+        Lesson.objects.update(content=f'<img src="/media/{in_html}">')
+        legacy = self.write("lesson_videos/old_upload_Ab12Cd.mp4")
+        staged = self.write(".staging/abandoned.mp4")
+        rendition = self.write("hls/1/abcdefgh/" + "0" * 64 + ".ts")
+
+        self.assertIn(orphan, self.gc("--dry-run"))
+        remaining = self.gc()
+        self.assertEqual(remaining, sorted([referenced, young_orphan, in_html, legacy, rendition]))
+        self.assertNotIn(staged, remaining)
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def png(self, size, mode="RGB"):
+        buffer = BytesIO()
+        Image.new(mode, size).save(buffer, "PNG")
+        return SimpleUploadedFile("avatar.png", buffer.getvalue(), content_type="image/png")
+
+    def signup(self, avatar):
+        return self.client.post("/signup/", {
+            "username": "student", "email": "student@example.com", "password": "password1",
+            "confirm_password": "password1", "avatar": avatar,
+        })
+
+    def test_variants_of_a_signup_avatar(self):
+        self.assertEqual(self.signup(self.png((400, 200))).status_code, 201)
+        student = Student.objects.get()
+        self.assertEqual(student.avatar_variants["source"], student.avatar.name)
+        self.assertEqual(set(student.avatar_variants["widths"]), {"160", "320"})
+
+    def test_oversized_avatar_is_kept_without_variants(self):
+        # 64 megapixels in a few kilobytes of PNG: under Pillow's bomb limit, over ours.
+        with self.assertLogs("myapp.images", "WARNING"):
+            response = self.signup(self.png((8000, 8000), mode="1"))
+        self.assertEqual(response.status_code, 201)
+        student = Student.objects.get()
+        self.assertTrue(student.avatar)
+        self.assertEqual(student.avatar_variants, {"source": student.avatar.name, "widths": {}})
+
+    def test_decompression_bomb_is_not_decoded(self):
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000), mock.patch.object(images, "MAX_SOURCE_PIXELS", 10 ** 6):
+            with self.assertLogs("myapp.images", "WARNING"):
+                student = Student.objects.create(username="student", avatar=self.png((100, 100)))
+        self.assertEqual(Student.objects.get(pk=student.pk).avatar_variants["widths"], {})
+
+
+class LessonVideoTests(TestCase):
+    content = b"0123456789"
+
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        course = Course.objects.create(title="Course", description="d", duration=7 * 24 * 60)
+        module = Module.objects.create(module="Module", course=course, duration=60)
+        self.lesson = Lesson.objects.create(name="Lesson", module=module,
+                                            uploaded_video=SimpleUploadedFile("clip.mp4", self.content))
+        self.url = f"/courses/{course.id}/{self.lesson.id}/video/"
+
+    def test_full_response(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_ranges(self):
+        for header, body, content_range in [
+            ("bytes=2-5", b"2345", "bytes 2-5/10"),
+            ("bytes=7-", b"789", "bytes 7-9/10"),
+            ("bytes=-3", b"789", "bytes 7-9/10"),
+            ("bytes=8-100", b"89", "bytes 8-9/10"),
+        ]:
+            with self.subTest(header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b"".join(response.streaming_content), body)
+                self.assertEqual(response["Content-Range"], content_range)
+                self.assertEqual(response["Content-Length"], str(len(body)))
+
+    def test_unsatisfiable_range(self):
+        for header in ("bytes=10-", "bytes=5-2", "bytes=-0"):
+            with self.subTest(header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_stale_if_range_gets_the_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+    async def test_async_range(self):
+        response = await AsyncClient().get(self.url, headers={"Range": "bytes=2-5"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join([chunk async for chunk in response.streaming_content]), b"2345")
+
+    def test_accel_redirect(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected/"):
+            response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected/" + self.lesson.uploaded_video.name)
+        self.assertEqual(response.content, b"")
+
+    def test_missing_video(self):
+        Lesson.objects.update(uploaded_video="")
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def cache(self, maxsize=10, ttl=60):
+        self.enterContext(mock.patch.object(authentication, "time", self.clock))
+        return authentication.TokenCache(maxsize, ttl)
+
+    def token(self, lifetime=3600):
+        return {"exp": self.clock.now + lifetime}
+
+    def test_least_recently_used_entry_is_evicted(self):
+        tokens = self.cache(maxsize=2)
+        a, b, c = self.token(), self.token(), self.token()
+        tokens.set("a", a)
+        tokens.set("b", b)
+        self.assertIs(tokens.get("a"), a)
+        tokens.set("c", c)
+        self.assertIsNone(tokens.get("b"))
+        self.assertIs(tokens.get("a"), a)
+        self.assertIs(tokens.get("c"), c)
+
+    def test_entries_expire_after_the_ttl_or_the_token(self):
+        tokens = self.cache(ttl=60)
+        tokens.set("long", self.token())
+        tokens.set("short", self.token(lifetime=10))
+        tokens.set("expired", self.token(lifetime=0))
+        self.assertIsNone(tokens.get("expired"))
+
+        self.clock.now += 10
+        self.assertIsNone(tokens.get("short"))
+        self.assertIsNotNone(tokens.get("long"))
+        self.clock.now += 50
+        self.assertIsNone(tokens.get("long"))
+
+    def test_zero_size_caches_nothing(self):
+        tokens = self.cache(maxsize=0)
+        tokens.set("a", self.token())
+        self.assertIsNone(tokens.get("a"))
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_cached_token_skips_verification_and_revocation_lookup(self):
+        self.enterContext(mock.patch.object(authentication, "token_cache", authentication.TokenCache(10, 60)))
+        student = Student.objects.create(username="student", email="student@example.com")
+        raw = str(authentication.StudentRefreshToken.for_user(student).access_token).encode()
+        auth = authentication.StudentJWTAuthentication()
+
+        with self.assertNumQueries(1):
+            auth.get_validated_token(raw)
+        with self.assertNumQueries(0), mock.patch.object(
+            authentication.JWTAuthentication, "get_validated_token", side_effect=AssertionError
+        ):
+            self.assertEqual(auth.get_validated_token(raw)[authentication.STUDENT_ID_CLAIM], student.id)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch.object(authentication, "token_cache", authentication.TokenCache(10, 60)))
+        student = Student.objects.create(username="student", email="student@example.com")
+        self.refresh = authentication.StudentRefreshToken.for_user(student)
+        self.access = self.refresh.access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def forget_everything(self):
+        # What another process sees: nothing cached locally, only the database.
+        cache.clear()
+        authentication.token_cache.clear()
+
+    def test_revoked_token_is_rejected_on_a_cache_miss(self):
+        authentication.revoke_token(self.access)
+        self.forget_everything()
+        with self.assertNumQueries(1), self.assertRaises(authentication.InvalidToken):
+            authentication.StudentJWTAuthentication().get_validated_token(str(self.access).encode())
+        with self.assertNumQueries(0):
+            self.assertTrue(revocation.is_revoked(self.access["jti"]))
+
+    def test_expired_revocations_are_ignored_and_purged(self):
+        RevokedToken.objects.create(jti="old", expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(revocation.is_revoked("old"))
+        self.assertEqual(revocation.purge_expired(), 1)
+
+    def test_logout_revokes_the_access_and_refresh_tokens(self):
+        self.assertEqual(self.client.get("/profile/").status_code, 200)
+        self.assertEqual(self.client.post("/logout/", {"refresh": str(self.refresh)}).status_code, 204)
+        self.assertEqual(self.client.get("/profile/").status_code, 401)
+
+        self.forget_everything()
+        self.assertEqual(self.client.get("/profile/").status_code, 401)
+        refreshed = APIClient().post("/api/token/refresh/", {"refresh": str(self.refresh)})
+        self.assertEqual(refreshed.status_code, 401)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EnrollmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title="Course", description="d", duration=7 * 24 * 60)
+        module = Module.objects.create(module="Module", course=self.course, duration=60)
+        self.lesson = Lesson.objects.create(name="Lesson", module=module, video_url="https://example.com/v")
+        self.student = Student.objects.create(username="student", email="student@example.com")
+        self.other = Student.objects.create(username="other", email="other@example.com")
+
+    def enrolled(self, student=None):
+        return enrollment.enrolled_course_ids((student or self.student).id)
+
+    def changed_in_transaction(self, change):
+        # A reader caching the old set before the commit must not keep it afterwards.
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+            cache.set(enrollment._enrollment_key(self.student.id), self.enrolled() | {0})
+
+    def test_add_and_remove_invalidate_the_cached_set(self):
+        self.assertEqual(self.enrolled(), set())
+        self.changed_in_transaction(lambda: self.student.enrolled_courses.add(self.course))
+        self.assertEqual(self.enrolled(), {self.course.id})
+        self.changed_in_transaction(lambda: self.student.enrolled_courses.remove(self.course))
+        self.assertEqual(self.enrolled(), set())
+
+    def test_changes_from_the_course_side_invalidate_the_cached_set(self):
+        self.changed_in_transaction(lambda: self.course.students.add(self.student))
+        self.assertEqual(self.enrolled(), {self.course.id})
+        self.changed_in_transaction(self.course.students.clear)
+        self.assertEqual(self.enrolled(), set())
+
+    def test_bulk_enroll_invalidates_the_cached_set(self):
+        self.changed_in_transaction(lambda: enrollment.bulk_enroll([self.student.id], [self.course.id]))
+        self.assertEqual(self.enrolled(), {self.course.id})
+        self.assertEqual(self.enrolled(self.other), set())
+
+    def client_for(self, student):
+        client = APIClient()
+        access = authentication.StudentRefreshToken.for_user(student).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+    def test_enrollment_only_applies_to_its_student(self):
+        self.student.enrolled_courses.add(self.course)
+        complete = f"/courses/{self.course.id}/{self.lesson.id}/complete/"
+        self.assertEqual(self.client_for(self.student).post(complete).status_code, 200)
+        self.assertEqual(self.client_for(self.other).post(complete).status_code, 403)
+
+        badges = {
+            student.username: [course["enrolled"] for course in self.client_for(student).get("/courses/").json()["results"]]
+            for student in (self.student, self.other)
+        }
+        self.assertEqual(badges, {"student": [True], "other": [False]})
+
+    def test_students_cannot_enroll_through_the_endpoint(self):
+        response = self.client_for(self.student).post(
+            "/enrollments/", {"students": [self.other.id], "courses": [self.course.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.enrolled(self.other), set())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = Student.objects.create(username="student", email="student@example.com")
+        self.other = Student.objects.create(username="other", email="other@example.com")
+        self.courses = [self.create_course(title, lessons) for title, lessons in (("A", 3), ("B", 2), ("C", 0), ("D", 1))]
+        self.student.enrolled_courses.add(*self.courses[:3])
+        self.other.enrolled_courses.add(*self.courses)
+
+    def create_course(self, title, lessons):
+        course = Course.objects.create(title=title, description="d", duration=7 * 24 * 60)
+        module = Module.objects.create(module="Module", course=course, duration=60)
+        for i in range(lessons):
+            Lesson.objects.create(name=f"Lesson {i}", module=module, video_url="https://example.com/v")
+        return course
+
+    def complete(self, student, course, count):
+        lessons = Lesson.objects.filter(module__course=course).order_by("id")[:count]
+        LessonCompletion.objects.bulk_create(
+            [LessonCompletion(student=student, lesson=lesson, course=course) for lesson in lessons]
+        )
+
+    def dashboard(self, token, **params):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client.get("/dashboard/", params)
+
+    def student_token(self):
+        return authentication.StudentRefreshToken.for_user(self.student).access_token
+
+    def test_progress_per_course(self):
+        self.complete(self.student, self.courses[0], 1)
+        self.complete(self.student, self.courses[1], 2)
+        self.complete(self.other, self.courses[0], 3)
+
+        response = self.dashboard(self.student_token())
+        self.assertEqual(response.status_code, 200)
+        progress = {course["title"]: (course["completed_lessons"], course["progress"]) for course in response.json()["results"]}
+        self.assertEqual(progress, {"A": (1, 33.3), "B": (2, 100.0), "C": (0, 0.0)})
+        self.assertTrue(all(isinstance(course["progress"], float) for course in response.data["results"]))
+
+    def test_pages(self):
+        first = self.dashboard(self.student_token(), page_size=2).json()
+        second = self.dashboard(self.student_token(), page_size=2, cursor=first["next_cursor"]).json()
+        self.assertEqual([course["title"] for course in first["results"] + second["results"]], ["A", "B", "C"])
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(self.dashboard(self.student_token(), cursor="bogus").status_code, 400)
+
+    def test_non_student_token_is_not_found(self):
+        admin = User.objects.create_user("admin", password="x", is_staff=True)
+        self.assertEqual(self.dashboard(RefreshToken.for_user(admin).access_token).status_code, 404)
+        self.assertEqual(APIClient().get("/dashboard/").status_code, 401)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.courses = [
+            Course.objects.create(title=f"Курс {i}", description="d", duration=7 * 24 * 60) for i in range(5)
+        ]
+        for course in self.courses:
+            module = Module.objects.create(module="Module", course=course, duration=60)
+            Lesson.objects.create(name="Lesson", module=module, video_url="https://example.com/v", content="<p>secret</p>")
+
+    def records(self, body):
+        lines = body.decode().split("\n")
+        self.assertEqual(lines.pop(), "")
+        return [json.loads(line) for line in lines]
+
+    def test_one_course_per_line(self):
+        response = self.client.get("/courses/export/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = self.records(b"".join(response.streaming_content))
+        self.assertEqual([record["id"] for record in records], [course.id for course in self.courses])
+        self.assertEqual(records[0]["title"], "Курс 0")
+        lesson = records[1]["modules"][0]["lessons"][0]
+        self.assertEqual(lesson["name"], "Lesson")
+        self.assertNotIn("content", lesson)
+
+    def test_lines_are_produced_per_chunk(self):
+        lines = export.export_lines(chunk_size=2)
+        with self.assertNumQueries(3):  # the course cursor, then modules and lessons of the first two
+            next(lines)
+            next(lines)
+        with self.assertNumQueries(2):  # modules and lessons of the next two
+            next(lines)
+            next(lines)
+
+    def test_updated_since(self):
+        Course.objects.filter(pk=self.courses[0].pk).update(updated_at=timezone.now() + timedelta(days=1))
+        since = (timezone.now() + timedelta(hours=1)).isoformat()
+        response = self.client.get("/courses/export/", {"updated_since": since})
+        self.assertEqual([record["id"] for record in self.records(b"".join(response.streaming_content))],
+                         [self.courses[0].id])
+        self.assertEqual(self.client.get("/courses/export/", {"updated_since": "yesterday"}).status_code, 400)
+
+    async def test_async_export(self):
+        response = await AsyncClient().get("/courses/export/")
+        records = self.records(b"".join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual(len(records), 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("admin", is_staff=True))
+
+    def course(self, title="Course", video_url="https://example.com/v"):
+        return {
+            "title": title, "description": "d", "duration": "2 weeks",
+            "modules": [{"module": "Module", "duration": "1 hour", "lessons": [
+                {"name": "Lesson", "video_url": video_url},
+            ]}],
+        }
+
+    def counts(self):
+        return Course.objects.count(), Module.objects.count(), Lesson.objects.count()
+
+    def test_import_creates_every_row(self):
+        response = self.client.post("/courses/import/", {"courses": [self.course("A"), self.course("B")]}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["courses"], 2)
+        self.assertEqual(self.counts(), (2, 2, 2))
+        self.assertEqual(Course.objects.get(title="A").total_lessons, 1)
+
+    def test_bad_row_creates_nothing(self):
+        courses = [self.course("A"), self.course("B", video_url="not a url"), {"title": "C"}]
+        response = self.client.post("/courses/import/", courses, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"], [
+            "courses[1].modules[0].lessons[0]: video_url is not a valid URL.",
+            "courses[2]: description is required.",
+            "courses[2]: Enter a valid duration (e.g., '3 weeks' or '1 day').",
+        ])
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_bad_csv_line_creates_nothing(self):
+        rows = [
+            ",".join(course_import.REQUIRED_CSV_COLUMNS),
+            "A,d,2 weeks,Module,1 hour,Lesson 1,https://example.com/1",
+            ",,,,,Lesson 2,ftp:/broken",
+        ]
+        upload = SimpleUploadedFile("courses.csv", "\n".join(rows).encode(), content_type="text/csv")
+        response = self.client.post("/courses/import/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"], ["line 3: video_url is not a valid URL."])
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_failed_insert_rolls_back(self):
+        with mock.patch.object(Lesson.objects, "bulk_create", side_effect=IntegrityError), \
+                self.assertRaises(IntegrityError):
+            course_import.import_courses([self.course()])
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_dry_run_only_validates(self):
+        response = self.client.post("/courses/import/?dry_run=1", [self.course()], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"courses": 1, "modules": 1, "lessons": 1, "course_ids": []})
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_students_cannot_import(self):
+        student = Student.objects.create(username="student", email="student@example.com")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {authentication.StudentRefreshToken.for_user(student).access_token}")
+        self.assertEqual(client.post("/courses/import/", [self.course()], format="json").status_code, 403)
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    DRF's per-key history of request times, i.e. a sliding-window log, kept in
+    the cache named by ``settings.THROTTLE_CACHE``.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, "THROTTLE_CACHE", "default")]
+        super().__init__()
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    scope = "login_ip"
+
+
+class LoginAccountThrottle(SlidingWindowThrottle):
+    """Keyed by the username/email being tried, so one account can't be sprayed from many IPs."""
+
+    scope = "login_account"
+
+    def get_ident_value(self, request):
+        data = request.data if hasattr(request.data, "get") else {}
+        account = data.get("username") or data.get("email")
+        return str(account).strip().lower() if account else None
+
+
+class SignupIPThrottle(SlidingWindowThrottle):
+    scope = "signup_ip"
+
+
+class ExportThrottle(SlidingWindowThrottle):
+    scope = "export"
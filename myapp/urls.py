@@ -1,15 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .throttling import LoginAccountThrottle, LoginIPThrottle
+
+# The ASGI profile serves the hot read endpoints from async views.
+reads = async_views if settings.ASYNC_READ_VIEWS else views
 
 urlpatterns = [
-    path('courses/', views.course_list, name='Список курсов'),
-    path('courses/<int:id>/', views.course, name='Страница курса'),
-    path('courses/<int:id>/<int:lessonid>/', views.lesson, name='Страница урока'),
+    path('courses/', reads.course_list, name='Список курсов'),
+    path('courses/autocomplete/', views.course_autocomplete, name='Автодополнение курсов'),
+    path('courses/export/', views.course_export, name='Экспорт каталога'),
+    path('courses/import/', views.course_import, name='Импорт курсов'),
+    path('courses/search/', views.course_search, name='Поиск курсов'),
+    path('courses/<int:id>/', reads.course, name='Страница курса'),
+    path('courses/<int:id>/reviews/', views.course_reviews, name='Отзывы курса'),
+    path('courses/<int:id>/<int:lessonid>/', reads.lesson, name='Страница урока'),
+    path('courses/<int:id>/<int:lessonid>/video/', views.lesson_video, name='Видео урока'),
+    path('courses/<int:id>/<int:lessonid>/complete/', views.lesson_complete, name='Завершение урока'),
+    path('enrollments/', views.enrollments, name='Массовая запись'),
     path('signup/', views.signup, name='Регистрация'),
     path('login/', views.login, name='Авторизация'),
     path('logout/', views.logout, name='Выход'),
     path('profile/', views.profile, name='Профиль'),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('dashboard/', views.dashboard, name='Мои курсы'),
+    path('api/token/', TokenObtainPairView.as_view(throttle_classes=[LoginIPThrottle, LoginAccountThrottle]), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
@@ -0,0 +1,198 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+
+from .models import Lesson
+
+logger = logging.getLogger(__name__)
+
+
+class Rendition(NamedTuple):
+    name: str
+    width: int
+    height: int
+    video_bitrate: int
+    audio_bitrate: int
+
+    @property
+    def bandwidth(self):
+        return self.video_bitrate + self.audio_bitrate
+
+
+RENDITIONS = (
+    Rendition("360p", 640, 360, 800_000, 96_000),
+    Rendition("480p", 854, 480, 1_400_000, 128_000),
+    Rendition("720p", 1280, 720, 2_800_000, 128_000),
+    Rendition("1080p", 1920, 1080, 5_000_000, 192_000),
+)
+
+
+class EncodingError(Exception):
+    pass
+
+
+class Encoder:
+    """Writes ``<output_dir>/<rendition>/index.m3u8`` plus its segments for each rendition."""
+
+    def encode(self, source_path, output_dir, renditions):
+        raise NotImplementedError
+
+
+class FFmpegEncoder(Encoder):
+    def __init__(self, binary=None, segment_seconds=None):
+        self.binary = binary or settings.FFMPEG_BINARY
+        self.segment_seconds = segment_seconds or settings.HLS_SEGMENT_SECONDS
+
+    def encode(self, source_path, output_dir, renditions):
+        for rendition in renditions:
+            target = os.path.join(output_dir, rendition.name)
+            os.makedirs(target, exist_ok=True)
+            command = [
+                self.binary, "-y", "-loglevel", "error", "-i", source_path,
+                "-vf", f"scale=-2:{rendition.height}",
+                "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main",
+                "-b:v", str(rendition.video_bitrate),
+                "-maxrate", str(int(rendition.video_bitrate * 1.07)),
+                "-bufsize", str(rendition.video_bitrate * 2),
+                "-g", str(self.segment_seconds * 30), "-sc_threshold", "0",
+                "-c:a", "aac", "-b:a", str(rendition.audio_bitrate), "-ac", "2",
+                "-hls_time", str(self.segment_seconds),
+                "-hls_playlist_type", "vod",
+                "-hls_segment_filename", os.path.join(target, "segment_%05d.ts"),
+                os.path.join(target, "index.m3u8"),
+            ]
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise EncodingError(result.stderr.strip() or f"ffmpeg exited with {result.returncode}")
+
+
+class PassthroughEncoder(Encoder):
+    """
+    Stand-in encoder for development and tests: every rendition is a one-segment
+    playlist holding an untouched copy of the source.
+    """
+
+    def encode(self, source_path, output_dir, renditions):
+        for rendition in renditions:
+            target = os.path.join(output_dir, rendition.name)
+            os.makedirs(target, exist_ok=True)
+            shutil.copyfile(source_path, os.path.join(target, "segment_00000.ts"))
+            with open(os.path.join(target, "index.m3u8"), "w") as playlist:
+                playlist.write(
+                    "#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:10\n#EXT-X-PLAYLIST-TYPE:VOD\n"
+                    "#EXTINF:10.0,\nsegment_00000.ts\n#EXT-X-ENDLIST\n"
+                )
+
+
+def master_playlist(renditions):
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for rendition in renditions:
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={rendition.bandwidth},RESOLUTION={rendition.width}x{rendition.height}"
+        )
+        lines.append(f"{rendition.name}/index.m3u8")
+    return "\n".join(lines) + "\n"
+
+
+def get_encoder():
+    return import_string(settings.VIDEO_ENCODER)()
+
+
+def hls_storage():
+    return FileSystemStorage(
+        location=os.path.join(settings.MEDIA_ROOT, "hls"),
+        base_url=f"{settings.MEDIA_URL}hls/",
+    )
+
+
+def requeue_stale_claims(timeout=None):
+    """
+    Moves lessons that have been processing for longer than ``VIDEO_CLAIM_TIMEOUT``
+    seconds, i.e. claimed by a worker that died, back to pending. Returns how many.
+    """
+    timeout = settings.VIDEO_CLAIM_TIMEOUT if timeout is None else timeout
+    now = timezone.now()
+    return Lesson.objects.filter(
+        video_status=Lesson.VIDEO_PROCESSING, updated_at__lt=now - timedelta(seconds=timeout)
+    ).update(video_status=Lesson.VIDEO_PENDING, updated_at=now)
+
+
+def claim_next_lesson():
+    """
+    Atomically moves one pending lesson to processing. The conditional UPDATE makes
+    it safe to run several workers against the same database. Stale claims are
+    requeued first; ``updated_at`` records when a lesson was claimed.
+    """
+    requeue_stale_claims()
+    candidates = Lesson.objects.filter(video_status=Lesson.VIDEO_PENDING).order_by("id")
+    for lesson_id in candidates.values_list("id", flat=True)[:10]:
+        claimed = Lesson.objects.filter(pk=lesson_id, video_status=Lesson.VIDEO_PENDING).update(
+            video_status=Lesson.VIDEO_PROCESSING, video_error="", updated_at=timezone.now()
+        )
+        if claimed:
+            return lesson_id
+    return None
+
+
+def _local_source(lesson, workdir):
+    try:
+        return lesson.uploaded_video.path
+    except NotImplementedError:
+        path = os.path.join(workdir, "source" + os.path.splitext(lesson.uploaded_video.name)[1])
+        with lesson.uploaded_video.open("rb") as source, open(path, "wb") as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        return path
+
+
+def process_lesson_video(lesson_id, encoder=None, renditions=RENDITIONS):
+    lesson = Lesson.objects.only("id", "uploaded_video", "hls_manifest").get(pk=lesson_id)
+    uploaded = lesson.uploaded_video.name
+    storage = hls_storage()
+    prefix = f"{lesson.id}/{get_random_string(8)}"
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            output_dir = os.path.join(workdir, "hls")
+            (encoder or get_encoder()).encode(_local_source(lesson, workdir), output_dir, renditions)
+            with open(os.path.join(output_dir, "master.m3u8"), "w") as playlist:
+                playlist.write(master_playlist(renditions))
+
+            for root, _dirs, files in os.walk(output_dir):
+                for filename in files:
+                    path = os.path.join(root, filename)
+                    name = f"{prefix}/{os.path.relpath(path, output_dir)}"
+                    with open(path, "rb") as content:
+                        storage.save(name, File(content))
+    except Exception as e:
+        logger.exception("Transcoding lesson %s failed", lesson_id)
+        shutil.rmtree(storage.path(prefix), ignore_errors=True)
+        Lesson.objects.filter(pk=lesson_id, uploaded_video=uploaded).update(
+            video_status=Lesson.VIDEO_FAILED, video_error=str(e)[:2000], updated_at=timezone.now()
+        )
+        return False
+
+    # Publish only if the upload was not replaced while we were encoding.
+    published = Lesson.objects.filter(pk=lesson_id, uploaded_video=uploaded).update(
+        video_status=Lesson.VIDEO_READY, hls_manifest=f"{prefix}/master.m3u8", updated_at=timezone.now()
+    )
+    stale = lesson.hls_manifest if published else f"{prefix}/master.m3u8"
+    if stale:
+        shutil.rmtree(storage.path(os.path.dirname(stale)), ignore_errors=True)
+    return bool(published)
+
+
+def hls_manifest_url(lesson):
+    if lesson.video_status != Lesson.VIDEO_READY or not lesson.hls_manifest:
+        return None
+    return hls_storage().url(lesson.hls_manifest)
@@ -1,31 +1,51 @@
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-
-from .models import Course, Lesson, Student, Review
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import StudentRefreshToken, TokenStudent, forget_token, revoke_token
+from .autocomplete import MAX_SUGGESTIONS, suggest
+from .cache import catalog_pages, get_course_detail
+from .conditional import make_etag, not_modified, set_validators
+from .course_import import InvalidImport, import_courses, read_json, read_upload
+from .enrollment import bulk_enroll, enrolled_course_ids, resolve_students
+from .export import aexport_lines, export_lines, parse_updated_since
+from .images import srcset
+from .models import Author, Course, Lesson, LessonCompletion, Student, Review, format_duration
+from .pagination import InvalidCursor, get_page_size, paginate
+from .search import highlight, search_courses, with_highlights
+from .streaming import serve_file
+from .throttling import ExportThrottle, LoginAccountThrottle, LoginIPThrottle, SignupIPThrottle
+from .video_processing import hls_manifest_url
 from .serializers import (
     RegistrationSerializer,
     LoginSerializer,
     CourseSerializer,
+    DashboardCourseSerializer,
     LessonSerializer,
     ModuleSerializer,
+    ProfileSerializer,
     ReviewSerializer
 )
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SignupIPThrottle])
 def signup(request):
     serializer = RegistrationSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = StudentRefreshToken.for_user(user)
         access_token = str(refresh.access_token)
 
         return Response({
@@ -40,11 +60,12 @@ def signup(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginAccountThrottle])
 def login(request):
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = StudentRefreshToken.for_user(user)
         access_token = str(refresh.access_token)
 
         return Response({
@@ -60,14 +81,19 @@ def login(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout(request):
-    refresh_token = request.COOKIES.get('refresh_token')
+    refresh_token = request.data.get('refresh') or request.COOKIES.get('refresh_token')
     if refresh_token:
         try:
-            token = RefreshToken(refresh_token)
+            token = StudentRefreshToken(refresh_token)
             token.blacklist()
-        except Exception:
+        except TokenError:
             return Response({"error": "Invalid token."}, status=status.HTTP_400_BAD_REQUEST)
 
+    # The access token used for this request stops working as well.
+    if request.auth is not None and api_settings.JTI_CLAIM in request.auth:
+        revoke_token(request.auth)
+        forget_token(request.auth.token)
+
     response = Response({"message": "Вы успешно вышли из системы."}, status=status.HTTP_204_NO_CONTENT)
     response.delete_cookie('refresh_token')
     return response
@@ -84,25 +110,324 @@ def profile(request):
     return Response(serializer.data)
 
 
+CATALOG_FIELDS = (
+    'id', 'title', 'course_image', 'course_image_variants', 'description', 'duration', 'level',
+    'author', 'author__user', 'author__user__username',
+    *Course.RATING_FIELDS,
+    *Course.TOTAL_FIELDS,
+)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """
+    The student's enrolled courses with completion progress, keyset-paginated.
+    Each page is one query: completions are counted per course by a correlated
+    subquery on the (student, course) index.
+    """
+    if not isinstance(request.user, TokenStudent):
+        return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    completed = (
+        LessonCompletion.objects.filter(student_id=request.user.id, course_id=OuterRef('pk'))
+        .values('course_id').annotate(total=Count('id')).values('total')
+    )
+    courses = (
+        Course.objects.filter(students__id=request.user.id)
+        .select_related('author__user').only(*CATALOG_FIELDS)
+        .annotate(completed_lessons=Coalesce(Subquery(completed), 0))
+    )
+    try:
+        page, next_cursor = paginate(courses, ('id',), request.query_params.get('cursor'), get_page_size(request))
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = DashboardCourseSerializer(page, many=True, context={'request': request})
+    return Response({"results": serializer.data, "next_cursor": next_cursor})
+
+
+def catalog_courses(params):
+    """The catalog queryset for the ``level``/``author``/duration filters; ``(None, error)`` when invalid."""
+    courses = Course.objects.select_related('author__user').only(*CATALOG_FIELDS)
+
+    level = params.get('level')
+    if level:
+        if level not in dict(Course.LEVEL_CHOICES):
+            return None, "Invalid level."
+        courses = courses.filter(level=level)
+
+    author = params.get('author')
+    if author:
+        if author.isdigit():
+            courses = courses.filter(author_id=int(author))
+        else:
+            courses = courses.filter(author__user__username=author)
+
+    for param, lookup in (('min_duration', 'duration__gte'), ('max_duration', 'duration__lte')):
+        value = params.get(param)
+        if value:
+            if not value.isdigit():
+                return None, f"{param} must be a number of minutes."
+            courses = courses.filter(**{lookup: int(value)})
+    return courses, None
+
+
+def student_enrollments(user):
+    """The cached enrolled course ids of a student principal; None for anyone else (admins, anonymous)."""
+    return enrolled_course_ids(user.id) if isinstance(user, TokenStudent) else None
+
+
+def catalog_etag(request, stamps, next_cursor, user_id=None, enrolled=None):
+    """
+    ETag of a catalog page. There is no Last-Modified: deleting a course or moving
+    one in or out of a page changes its membership without touching any stamp left on it.
+    """
+    etag_parts = [f"{row['id']}@{row['updated_at'].timestamp()}" for row in stamps] + [next_cursor]
+    if enrolled is not None:
+        etag_parts += [user_id, *sorted(row['id'] for row in stamps if row['id'] in enrolled)]
+    return make_etag(request.get_full_path(), *etag_parts)
+
+
+def catalog_page_key(stamps):
+    # Any edit touches updated_at, so a page's stamps identify its payload.
+    return make_etag(*(f"{row['id']}@{row['updated_at'].timestamp()}" for row in stamps)).strip('"')
+
+
+def catalog_page(stamps, build):
+    """The serialized courses of a catalog page, shared by every filter and student that lands on it."""
+    return catalog_pages.get_or_build((catalog_page_key(stamps),), build) if stamps else []
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
 def course_list(request):
-    courses = Course.objects.all()
-    if not courses:
-        return Response({'message': 'No courses available'})
-    serializer = CourseSerializer(courses, many=True, context={'request': request})
-    return Response(serializer.data)
+    courses, error = catalog_courses(request.query_params)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Page through (id, updated_at) stamps first so a revalidation costs one narrow query.
+    try:
+        stamps, next_cursor = paginate(
+            courses.values('id', 'updated_at'), ('id',), request.query_params.get('cursor'), get_page_size(request)
+        )
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Students get "enrolled" badges from their cached enrollment set; that makes the page private.
+    enrolled = student_enrollments(request.user)
+    private = enrolled is not None
+
+    etag = catalog_etag(request, stamps, next_cursor, request.user.id, enrolled)
+    response = not_modified(request, etag, private=private)
+    if response is not None:
+        return response
+
+    results = catalog_page(stamps, lambda: list(CourseSerializer(
+        courses.filter(id__in=[row['id'] for row in stamps]).order_by('id'), many=True, context={'request': request},
+    ).data))
+    if private:
+        results = [{**course_data, "enrolled": course_data["id"] in enrolled} for course_data in results]
+    response = Response({
+        "results": results,
+        "next_cursor": next_cursor,
+    })
+    return set_validators(response, etag, private=private)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@throttle_classes([ExportThrottle])
+def course_export(request):
+    """
+    The whole catalog as NDJSON: one course per line with its modules, lessons
+    (without content) and rating stats. ``?updated_since=<ISO datetime>`` limits
+    it to courses changed since then, for incremental syncs.
+    """
+    updated_since = request.query_params.get('updated_since')
+    try:
+        updated_since = parse_updated_since(updated_since) if updated_since else None
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Under ASGI a sync iterator would be read into memory in full before sending.
+    lines = aexport_lines(updated_since) if isinstance(request._request, ASGIRequest) else export_lines(updated_since)
+    response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="catalog.ndjson"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def course_import(request):
+    """
+    Creates courses with their modules and lessons from a JSON body or an uploaded
+    JSON/CSV ``file``, all or nothing. ``?dry_run=1`` only validates. Staff may name
+    each course's author; authors import courses as themselves.
+    """
+    author = None
+    if not getattr(request.user, 'is_staff', False):
+        author = Author.objects.filter(user_id=request.user.id).first() if getattr(request.user, 'role', None) == 'author' else None
+        if author is None:
+            return Response({"error": "Only staff and authors can import courses."}, status=status.HTTP_403_FORBIDDEN)
+
+    dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    upload = request.FILES.get('file')
+    try:
+        records = read_upload(upload) if upload else read_json(request.data)
+        summary = import_courses(records, author=author, dry_run=dry_run)
+    except InvalidImport as e:
+        return Response({"errors": e.errors}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(summary, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def course_search(request):
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": "Query parameter q is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        hits, next_cursor = search_courses(query, request.query_params.get('cursor'), get_page_size(request))
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    courses = Course.objects.select_related('author__user').only(*CATALOG_FIELDS, 'search_document')
+    courses = {course.id: course for course in with_highlights(courses.filter(id__in=[course_id for course_id, _ in hits]), query)}
+    results = []
+    for course_id, rank in hits:
+        if course_id in courses:
+            course = courses[course_id]
+            results.append({
+                **CourseSerializer(course, context={'request': request}).data,
+                "rank": rank,
+                "highlight": highlight(course, query),
+            })
+    return Response({"results": results, "next_cursor": next_cursor})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def course_autocomplete(request):
+    # Served from the in-process prefix index: no authentication, no database.
+    query = request.query_params.get('q', '')
+    limit = get_page_size(request, default=MAX_SUGGESTIONS, maximum=MAX_SUGGESTIONS)
+    return Response({"results": suggest(query, limit)})
+
+
+# Each ordering reads a review index forwards or backwards, so 'lowest' lists
+# equal ratings oldest first: review_course_rating_idx in reverse.
+REVIEW_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'highest': ('-rating', '-created_at', '-id'),
+    'lowest': ('rating', 'created_at', 'id'),
+}
+REVIEW_FIELDS = ('id', 'rating', 'feedback', 'created_at', 'user', 'user__username')
+REVIEW_PAGE_SIZE = 10
+
+
+def review_queryset(course_id, rating=None):
+    reviews = Review.objects.filter(course_id=course_id).select_related('user').only(*REVIEW_FIELDS)
+    if rating is not None:
+        reviews = reviews.filter(rating=rating)
+    return reviews
+
+
+def review_page(course_id, rating=None, sort='newest', cursor=None, page_size=REVIEW_PAGE_SIZE):
+    page, next_cursor = paginate(review_queryset(course_id, rating), REVIEW_ORDERINGS[sort], cursor, page_size)
+    return {
+        "results": ReviewSerializer(page, many=True).data,
+        "next_cursor": next_cursor,
+    }
+
+
+COURSE_DETAIL = Course.objects.select_related('author__user').defer('search_document', 'search_vector')
+
+
+def course_detail(course, modules, reviews):
+    """The student-independent course document; ``modules`` must come with their lessons."""
+    course_data = {
+        "id": course.id,
+        "title": course.title,
+        "description": course.description,
+        "course_image": course.course_image.url if course.course_image else None,
+        "course_image_srcset": srcset(course.course_image, course.course_image_variants),
+        "duration": format_duration(course.duration),
+        "duration_minutes": course.duration,
+        "level": course.level,
+        "rating_count": course.rating_count,
+        "rating_average": course.rating_average,
+        "rating_histogram": course.rating_histogram,
+        "total_lessons": course.total_lessons,
+        "total_module_minutes": course.total_module_minutes,
+    }
+
+    author_data = None
+    if course.author and course.author.user:
+        author_data = {
+            "id": course.author.user.id,
+            "username": course.author.user.username,
+            "about": course.author.user.about,
+            "avatar": course.author.user.avatar.url if course.author.user.avatar else None,
+            "avatar_srcset": srcset(course.author.user.avatar, course.author.user.avatar_variants),
+        }
+
+    return {
+        "Overview": course_data,
+        "Curriculum": ModuleSerializer(modules, many=True).data,
+        "Author": author_data,
+        "reviews": reviews,
+    }
+
+
+def build_course_detail(course_id):
+    course = get_object_or_404(COURSE_DETAIL.prefetch_related('modules__lessons'), id=course_id)
+    return course_detail(course, course.modules.all(), review_page(course.id))
+
+
+def course_page(detail, reviewed, enrolled):
+    """The course page for one student: the shared document plus their review form."""
+    can_write_review = not reviewed and enrolled
+
+    write_review_section = {
+        "allowed": can_write_review,
+        "message": "You can write a review for this course" if can_write_review else "You have already reviewed this course",
+        "form_fields": {
+            "rating": "Integer (1-5)",
+            "feedback": "Optional text"
+        }
+    } if can_write_review else None
+
+    return {
+        "Overview": detail["Overview"],
+        "Curriculum": detail["Curriculum"],
+        "Author": detail["Author"],
+        "Reviews": {
+            "existing_reviews": detail["reviews"]["results"],
+            "next_cursor": detail["reviews"]["next_cursor"],
+            "write_review": write_review_section
+        }
+    }
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def course(request, id):
     try:
-        course = get_object_or_404(Course.objects.prefetch_related('modules', 'modules__lessons', 'reviews'), id=id)
-        student = request.user.student  # Get authenticated student
+        # Claims from the token; the Student row is only loaded to write a review.
+        user = request.user
+        if not isinstance(user, TokenStudent):
+            return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # Handle review submission (POST)
         if request.method == 'POST':
+            student = user.student
+            if student is None:
+                return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+            course = get_object_or_404(Course, id=id)
             existing_review = Review.objects.filter(user=student, course=course).first()
             if existing_review:
                 return Response({"error": "You have already reviewed this course."}, status=status.HTTP_400_BAD_REQUEST)
@@ -117,74 +442,153 @@ def course(request, id):
 
             return Response({"message": "Review submitted successfully!"}, status=status.HTTP_201_CREATED)
 
-        # Fetch course data
-        course_data = {
-            "id": course.id,
-            "title": course.title,
-            "description": course.description,
-            "course_image": course.course_image.url if course.course_image else None,
-            "duration": course.duration,
-            "level": course.level,
-        }
+        # One indexed lookup yields the content stamp and the student's review state;
+        # enrollment comes from the cached enrollment set.
+        stamp = Course.objects.filter(id=id).annotate(
+            reviewed=Exists(Review.objects.filter(course=OuterRef('pk'), user_id=user.id)),
+        ).values('updated_at', 'reviewed').first()
+        if stamp is None:
+            raise Http404
+        stamp['enrolled'] = id in student_enrollments(user)
 
-        modules = course.modules.all()
-        module_serializer = ModuleSerializer(modules, many=True)
-
-        author_data = None
-        if course.author and course.author.user:
-            author_data = {
-                "id": course.author.user.id,
-                "username": course.author.user.username,
-                "about": course.author.user.about,
-                "avatar": course.author.user.avatar.url if course.author.user.avatar else None,
-            }
-
-        # Fetch existing reviews
-        reviews = Review.objects.filter(course=course)
-        reviews_data = ReviewSerializer(reviews, many=True).data
-
-        # Check if the student has already reviewed
-        existing_review = Review.objects.filter(user=student, course=course).first()
-        can_write_review = not existing_review and student.is_enrolled(course)
-
-        write_review_section = {
-            "allowed": can_write_review,
-            "message": "You can write a review for this course" if can_write_review else "You have already reviewed this course",
-            "form_fields": {
-                "rating": "Integer (1-5)",
-                "feedback": "Optional text"
-            }
-        } if can_write_review else None
-
-        response_data = {
-            "Overview": course_data,
-            "Curriculum": module_serializer.data,
-            "Author": author_data,
-            "Reviews": {
-                "existing_reviews": reviews_data,
-                "write_review": write_review_section
-            }
-        }
+        etag = make_etag('course', id, stamp['updated_at'].timestamp(), user.id, stamp['reviewed'], stamp['enrolled'])
+        response = not_modified(request, etag, private=True)
+        if response is not None:
+            return response
 
-        return Response(response_data, status=200)
+        # Shared, student-independent part of the page (cached per content version)
+        detail = get_course_detail(id, lambda: build_course_detail(id))
 
+        response_data = course_page(detail, stamp['reviewed'], stamp['enrolled'])
+        return set_validators(Response(response_data, status=200), etag, private=True)
+
+    except Http404:
+        raise
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def lesson(request, id, lessonid=None, name=None):
-    course = get_object_or_404(Course, id=id)
-    lesson = get_object_or_404(Lesson, id=lessonid, module__course=course)
+def course_reviews(request, id):
+    sort = request.query_params.get('sort', 'newest')
+    if sort not in REVIEW_ORDERINGS:
+        return Response({"error": f"Sort must be one of: {', '.join(REVIEW_ORDERINGS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    rating = request.query_params.get('rating')
+    if rating is not None:
+        if not rating.isdigit() or int(rating) not in range(1, 6):
+            return Response({"error": "Rating must be between 1 and 5."}, status=status.HTTP_400_BAD_REQUEST)
+        rating = int(rating)
+
+    cursor = request.query_params.get('cursor')
+    try:
+        data = review_page(id, rating, sort, cursor, get_page_size(request, default=REVIEW_PAGE_SIZE))
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Only an empty first page needs to tell "no reviews" apart from "no course".
+    if not data["results"] and not cursor and not Course.objects.filter(id=id).exists():
+        raise Http404
+
+    return Response(data)
+
 
-    lesson_data = {
+def lesson_data(request, id, lesson):
+    manifest_url = hls_manifest_url(lesson)
+    return {
         "id": lesson.id,
         "name": lesson.name,
         "description": lesson.short_description,
         "content": lesson.content,
         "video_url": lesson.video_url if lesson.video_url else None,
         "uploaded_video": lesson.uploaded_video.url if lesson.uploaded_video else None,
+        "video_stream_url": request.build_absolute_uri(
+            reverse('Видео урока', kwargs={'id': id, 'lessonid': lesson.id})
+        ) if lesson.uploaded_video else None,
+        "video_status": lesson.video_status,
+        "hls_manifest_url": request.build_absolute_uri(manifest_url) if manifest_url else None,
     }
 
-    return Response(lesson_data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def lesson(request, id, lessonid=None, name=None):
+    lessons = Lesson.objects.filter(id=lessonid, module__course_id=id)
+    updated_at = lessons.values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        raise Http404
+
+    etag = make_etag('lesson', lessonid, updated_at.timestamp())
+    response = not_modified(request, etag, updated_at)
+    if response is not None:
+        return response
+
+    lesson = get_object_or_404(lessons)
+    return set_validators(Response(lesson_data(request, id, lesson), status=status.HTTP_200_OK), etag, updated_at)
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([AllowAny])
+def lesson_video(request, id, lessonid):
+    name = Lesson.objects.filter(id=lessonid, module__course_id=id).values_list('uploaded_video', flat=True).first()
+    if not name:
+        raise Http404
+
+    return serve_file(request, Lesson._meta.get_field('uploaded_video').storage, name)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def enrollments(request):
+    """
+    Enrolls many students in many courses at once. Staff may enroll into any
+    course; authors only into their own.
+    """
+    identifiers = request.data.get('students')
+    course_ids = request.data.get('courses')
+    if not isinstance(identifiers, list) or not isinstance(course_ids, list):
+        return Response({"error": "'students' and 'courses' must be lists."}, status=status.HTTP_400_BAD_REQUEST)
+    if not all(isinstance(course_id, int) for course_id in course_ids):
+        return Response({"error": "'courses' must be a list of course ids."}, status=status.HTTP_400_BAD_REQUEST)
+
+    courses = Course.objects.filter(id__in=course_ids)
+    if not getattr(request.user, 'is_staff', False):
+        if getattr(request.user, 'role', None) != 'author':
+            return Response({"error": "Only staff and authors can enroll students."}, status=status.HTTP_403_FORBIDDEN)
+        if courses.exclude(author__user_id=request.user.id).exists():
+            return Response({"error": "You can only enroll students in your own courses."}, status=status.HTTP_403_FORBIDDEN)
+
+    found_courses = set(courses.values_list('id', flat=True))
+    student_ids, unknown_students = resolve_students(identifiers)
+    created = bulk_enroll(student_ids, found_courses)
+
+    return Response({
+        "enrolled": created,
+        "already_enrolled": len(student_ids) * len(found_courses) - created,
+        "unknown_students": unknown_students,
+        "unknown_courses": sorted(set(course_ids) - found_courses),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def lesson_complete(request, id, lessonid):
+    """Marks a lesson of an enrolled course as completed (POST) or not completed (DELETE)."""
+    if not isinstance(request.user, TokenStudent):
+        return Response({"error": "Student profile not found"}, status=status.HTTP_404_NOT_FOUND)
+    if id not in student_enrollments(request.user):
+        return Response({"error": "You are not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
+    if not Lesson.objects.filter(id=lessonid, module__course_id=id).exists():
+        raise Http404
+
+    completions = LessonCompletion.objects.filter(student_id=request.user.id, lesson_id=lessonid)
+    if request.method == 'DELETE':
+        completions.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    # Idempotent: repeating the request keeps the first completion time.
+    LessonCompletion.objects.bulk_create(
+        [LessonCompletion(student_id=request.user.id, lesson_id=lessonid, course_id=id)], ignore_conflicts=True,
+    )
+    return Response({"completed": True}, status=status.HTTP_200_OK)